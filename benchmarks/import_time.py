@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Benchmark for the time it takes to import fsc.async_tools, and to access
+one of its members.
+"""
+
+import sys
+import subprocess
+
+
+def import_time(statement):
+    """
+    Returns the cumulative import time in microseconds of the top-level
+    modules imported by the given statement, measured in a fresh interpreter.
+    """
+    cmd = [sys.executable, '-X', 'importtime', '-c', statement]
+    output = subprocess.run(
+        cmd, stderr=subprocess.PIPE, check=True, universal_newlines=True
+    ).stderr
+    total = 0
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Top-level imports are not indented in the importtime output.
+        if cumulative.strip().isdigit() and not name[1:].startswith(' '):
+            total += int(cumulative)
+    return total
+
+
+def main(repeat=10):
+    """
+    Run the import time benchmark. The time needed for the imports done at
+    interpreter startup is subtracted.
+    """
+    baseline = min(import_time('pass') for _ in range(repeat))
+    for label, statement in [
+        ('import', 'import fsc.async_tools'),
+        (
+            'import + access',
+            'import fsc.async_tools; fsc.async_tools.BatchSubmitter'
+        ),
+    ]:
+        best = min(import_time(statement) for _ in range(repeat))
+        print('{:<16} {:>8} us'.format(label, best - baseline))
+
+
+if __name__ == '__main__':
+    main()
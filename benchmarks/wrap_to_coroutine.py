@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Microbenchmark for the per-call overhead of the wrap_to_coroutine decorator.
+"""
+
+import timeit
+from collections.abc import Awaitable
+from functools import wraps
+
+from fsc.async_tools import wrap_to_coroutine
+
+
+def wrap_to_coroutine_generic(func):
+    """
+    Reference implementation which wraps every function, and checks the
+    result against the Awaitable ABC on each call.
+    """
+
+    @wraps(func)
+    async def inner(*args, **kwargs):  # pylint: disable=missing-docstring
+        res = func(*args, **kwargs)
+        if isinstance(res, Awaitable):
+            return await res
+        return res
+
+    return inner
+
+
+def func(x):
+    return x
+
+
+class Result:
+    """
+    Result type which is not one of the builtin types known to the fast path.
+    """
+
+    def __init__(self, x):
+        self.x = x
+
+
+async def coro(x):
+    return x
+
+
+def drive(coro_func, num_calls):
+    """
+    Runs the given coroutine function without an event loop, since none of
+    the calls actually suspend.
+    """
+    for i in range(num_calls):
+        try:
+            coro_func(i).send(None)
+        except StopIteration:
+            pass
+
+
+def main(num_calls=100000, repeat=5):
+    """
+    Run the wrap_to_coroutine benchmark.
+    """
+    # The 'object' rows use the Awaitable ABC fallback of wrap_to_coroutine,
+    # and should be on par with the generic implementation.
+    for name, target in [('function', func), ('object', Result),
+                         ('coroutine', coro)]:
+        for label, decorator in [
+            ('generic', wrap_to_coroutine_generic),
+            ('wrap_to_coroutine', wrap_to_coroutine),
+        ]:
+            wrapped = decorator(target)
+            best = min(
+                timeit.repeat(
+                    lambda: drive(wrapped, num_calls),  # pylint: disable=cell-var-from-loop
+                    number=1,
+                    repeat=repeat
+                )
+            )
+            print(
+                '{:<10} {:<18} {:.3f} us/call'.format(
+                    name, label, 1e6 * best / num_calls
+                )
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -7,11 +7,72 @@
 Defines tools for simplifying the use of asynchronous Python.
 """
 
-from ._version import __version__
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-from ._periodic_task import *
-from ._wrap_to_coroutine import *
-from ._batch_submit import *
-from ._limit_parallel import *
+# The submodules are imported lazily, on first access of one of the names
+# they define.
+_SUBMODULES = {
+    'PeriodicTask': '_periodic_task',
+    'PeriodicScheduler': '_periodic_scheduler',
+    'wrap_to_coroutine': '_wrap_to_coroutine',
+    'BatchSubmitter': '_batch_submit',
+    'limit_parallel': '_limit_parallel',
+    'amap': '_amap',
+    'retry': '_retry',
+    'RetryPolicy': '_retry',
+    'RetryBudget': '_retry',
+    'hedge': '_hedge',
+    'CircuitBreaker': '_circuit_breaker',
+    'CircuitOpenError': '_circuit_breaker',
+    'memoize': '_memoize',
+    'BatchServer': '_batch_server',
+    'BatchClient': '_batch_server',
+    'BatchStage': '_batch_pipeline',
+    'BatchPipeline': '_batch_pipeline',
+    'WriteBehindBuffer': '_write_behind',
+    'LoopLagMonitor': '_loop_monitor',
+    'VirtualTimeEventLoop': '_simulation',
+    'SimulationResult': '_simulation',
+    'simulate_load': '_simulation',
+}
 
-__all__ = _periodic_task.__all__ + _wrap_to_coroutine.__all__ + _batch_submit.__all__ + _limit_parallel.__all__  # pylint: disable=undefined-variable
+__all__ = list(_SUBMODULES)
+
+if TYPE_CHECKING:  # pragma: no cover
+    # Lets static analysis tools see the lazily imported names.
+    from ._version import __version__
+    from ._periodic_task import PeriodicTask
+    from ._periodic_scheduler import PeriodicScheduler
+    from ._wrap_to_coroutine import wrap_to_coroutine
+    from ._batch_submit import BatchSubmitter
+    from ._limit_parallel import limit_parallel
+    from ._amap import amap
+    from ._retry import retry, RetryPolicy, RetryBudget
+    from ._hedge import hedge
+    from ._circuit_breaker import CircuitBreaker, CircuitOpenError
+    from ._memoize import memoize
+    from ._batch_server import BatchServer, BatchClient
+    from ._batch_pipeline import BatchStage, BatchPipeline
+    from ._write_behind import WriteBehindBuffer
+    from ._loop_monitor import LoopLagMonitor
+    from ._simulation import VirtualTimeEventLoop, SimulationResult, simulate_load
+
+
+def __getattr__(name):
+    if name == '__version__':
+        module_name = '_version'
+    else:
+        try:
+            module_name = _SUBMODULES[name]
+        except KeyError:
+            raise AttributeError(
+                "module '{}' has no attribute '{}'".format(__name__, name)
+            ) from None
+    value = getattr(import_module('.' + module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | {'__version__'})
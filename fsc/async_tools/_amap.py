@@ -0,0 +1,95 @@
+"""
+Defines an asynchronous map which limits the number of parallel calls.
+"""
+
+import asyncio
+from collections import deque
+
+from fsc.export import export
+
+from ._wrap_to_coroutine import wrap_to_coroutine
+
+
+@export
+async def amap(func, iterable, *, max_num_parallel, ordered=True):
+    """
+    Applies a function or coroutine to each element of an iterable, and
+    yields the results as an asynchronous iterator. At most ``max_num_parallel``
+    calls are in flight at any time, and inputs are only consumed as calls
+    finish. The memory use is therefore independent of the size of the
+    input.
+
+    If one of the calls raises an exception, it is raised when the
+    corresponding result is reached, and the calls still in flight are
+    cancelled.
+
+    Arguments
+    ---------
+    func : Callable
+        The function or coroutine which is applied to each element.
+    iterable : Iterable or AsyncIterable
+        The inputs to the function.
+    max_num_parallel : int
+        The maximum number of calls which can run in parallel.
+    ordered : bool
+        Determines if the results are yielded in the order of the inputs.
+        In this case, a call which is slow to finish blocks new calls from
+        being started once ``max_num_parallel`` calls have been made since.
+        Otherwise, results are yielded in the order the calls finish.
+    """
+    if max_num_parallel <= 0:
+        raise ValueError('max_num_parallel must be positive')
+    func = wrap_to_coroutine(func)
+    loop = asyncio.get_event_loop()
+    if hasattr(iterable, '__aiter__'):
+        iterator = iterable.__aiter__()
+    else:
+        iterator = _iterate(iterable)
+
+    pending = deque() if ordered else set()
+    # In unordered mode, calls which are done but not yet yielded.
+    finished = deque()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_num_parallel:
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                task = loop.create_task(func(item))
+                if ordered:
+                    pending.append(task)
+                else:
+                    pending.add(task)
+            if not pending:
+                return
+            if ordered:
+                yield await pending[0]
+                pending.popleft()
+            else:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                finished.extend(done)
+                while finished:
+                    yield finished.popleft().result()
+    finally:
+        for task in list(pending) + list(finished):
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Mark exceptions as retrieved.
+                task.exception()
+        aclose = getattr(iterator, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+
+async def _iterate(iterable):
+    """
+    Turns a regular iterable into an asynchronous iterator.
+    """
+    for item in iterable:
+        yield item
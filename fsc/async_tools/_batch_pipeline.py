@@ -0,0 +1,167 @@
+"""
+Defines a pipeline of listable functions, which passes the inputs from one
+stage to the next in batches.
+"""
+
+import asyncio
+
+from fsc.export import export
+
+from ._batch_submit import _BatchCollector
+from ._wrap_to_coroutine import wrap_to_coroutine
+
+
+@export
+class BatchStage:
+    """
+    Describes a single stage of a :class:`.BatchPipeline`.
+
+    Arguments
+    ---------
+    func: Callable
+        Function or coroutine which is "listable", i.e. given a list of input
+        parameters it will return a list of results.
+    max_num_parallel : int
+        The maximum number of batches of this stage which run in parallel.
+    kwargs :
+        The ``timeout``, ``sleep_time``, ``wait_batch_size`` and
+        ``max_batch_size`` arguments, as for the :class:`.BatchSubmitter`.
+        The timeout is counted from the first input of each batch.
+    """
+
+    def __init__(self, func, *, max_num_parallel=1, **kwargs):
+        self.func = wrap_to_coroutine(func)
+        self.collector = _BatchCollector(**kwargs)
+        if max_num_parallel <= 0:
+            raise ValueError('max_num_parallel must be positive')
+        self.max_num_parallel = max_num_parallel
+
+
+@export
+class BatchPipeline:
+    """
+    Asynchronous context manager which passes inputs through a sequence of
+    listable functions. Each stage collects the results of the previous one
+    into its own batches, so the batch sizes can differ between stages.
+
+    The pipeline is called as a coroutine with a single input, and returns
+    the result of the last stage. If a stage raises an exception, it is
+    raised for all inputs of the failed batch.
+
+    Arguments
+    ---------
+    stages : list(BatchStage)
+        The stages of the pipeline, in order.
+    buffer_size : int
+        The maximum number of inputs waiting in front of each stage. When the
+        buffer of a stage is full, the previous stage (or the caller, for the
+        first stage) waits until there is space.
+    loop: EventLoop
+        The event loop on which the pipeline runs. Uses
+        ``asyncio.get_event_loop()`` by default.
+    """
+
+    def __init__(self, stages, *, buffer_size=10000, loop=None):
+        self._stages = list(stages)
+        if not self._stages:
+            raise ValueError('The pipeline must have at least one stage.')
+        self._loop = loop or asyncio.get_event_loop()
+        self._queues = [
+            asyncio.Queue(maxsize=buffer_size) for _ in self._stages
+        ]
+        self._workers = []
+        self._futures = set()
+
+    async def __call__(self, x):
+        """
+        Adds an input to the pipeline, and waits for its result.
+        """
+        if not self._workers:
+            raise RuntimeError(
+                'The pipeline must be entered as a context manager before it '
+                'is called.'
+            )
+        fut = self._loop.create_future()
+        self._futures.add(fut)
+        fut.add_done_callback(self._futures.discard)
+        try:
+            await self._queues[0].put((x, fut))
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        return await fut
+
+    async def __aenter__(self):
+        for idx in range(len(self._stages)):
+            self._workers.append(self._loop.create_task(self._run_stage(idx)))
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):  # pylint: disable=missing-docstring
+        # Let the inputs which are already in the pipeline finish.
+        while self._futures:
+            await asyncio.wait(list(self._futures))
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.wait(self._workers)
+        self._workers = []
+
+    async def _run_stage(self, idx):
+        """
+        Collects batches for the given stage, and launches them once fewer
+        than ``max_num_parallel`` batches of the stage are running.
+        """
+        stage = self._stages[idx]
+        queue = self._queues[idx]
+        semaphore = asyncio.Semaphore(stage.max_num_parallel)
+        batches = set()
+        try:
+            while True:
+                # The batch is only collected once it can be launched, such
+                # that the inputs arriving in the meantime join it.
+                await semaphore.acquire()
+                batch = await self._collect_batch(stage, queue)
+                task = self._loop.create_task(self._run_batch(idx, batch))
+                batches.add(task)
+                task.add_done_callback(batches.discard)
+                task.add_done_callback(lambda _: semaphore.release())
+        finally:
+            for task in batches:
+                task.cancel()
+
+    async def _run_batch(self, idx, batch):
+        """
+        Runs a single batch of the given stage, and passes on the results.
+        """
+        stage = self._stages[idx]
+        try:
+            results = await stage.func([x for x, _ in batch])
+            assert len(results) == len(batch)
+        except Exception as exc:  # pylint: disable=broad-except
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        is_last = idx == len(self._stages) - 1
+        for res, (_, fut) in zip(results, batch):
+            if fut.done():
+                # The caller was cancelled.
+                continue
+            if is_last:
+                fut.set_result(res)
+            else:
+                await self._queues[idx + 1].put((res, fut))
+
+    async def _collect_batch(self, stage, queue):
+        """
+        Waits for the first input, and then until either the timeout has
+        passed or the batch is big enough.
+        """
+        batch = [await queue.get()]
+        start_time = self._loop.time()
+        await stage.collector.wait(
+            queue,
+            loop=self._loop,
+            get_start_time=lambda: start_time,
+            num_taken=len(batch)
+        )
+        return stage.collector.take(queue, batch)
@@ -0,0 +1,257 @@
+"""
+Defines a server and client for collecting calls from several processes
+into the batches of a single :class:`.BatchSubmitter`, over a Unix domain
+socket.
+
+Each message is sent as a frame consisting of a header with the payload
+length, the request ID and a status byte, followed by the pickled payload.
+"""
+
+import os
+import pickle
+import struct
+import asyncio
+import itertools
+
+from fsc.export import export
+
+from ._batch_submit import BatchSubmitter
+
+_HEADER = struct.Struct('!IQB')
+_STATUS_OK = 0
+_STATUS_ERROR = 1
+
+
+def _encode_frame(request_id, status, obj):
+    """
+    Encodes an object into a frame.
+    """
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload), request_id, status) + payload
+
+
+async def _read_frame(reader):
+    """
+    Reads a frame, and returns the request ID, status and decoded object.
+    Raises :class:`asyncio.IncompleteReadError` if the connection was closed.
+    """
+    length, request_id, status = _HEADER.unpack(
+        await reader.readexactly(_HEADER.size)
+    )
+    return request_id, status, pickle.loads(await reader.readexactly(length))
+
+
+def _encode_error(request_id, exc):
+    """
+    Encodes an exception into a frame, replacing it with a RuntimeError if it
+    cannot be pickled.
+    """
+    try:
+        return _encode_frame(request_id, _STATUS_ERROR, exc)
+    except Exception:  # pylint: disable=broad-except
+        return _encode_frame(
+            request_id, _STATUS_ERROR, RuntimeError(repr(exc))
+        )
+
+
+@export
+class BatchServer:
+    """
+    Asynchronous context manager that accepts inputs from :class:`.BatchClient`
+    instances over a Unix domain socket, and submits them in batches to a
+    function. The results are sent back to the client which submitted the
+    input.
+
+    Inputs, results and exceptions are sent with :mod:`pickle`, so the
+    socket should only be accessible to trusted processes.
+
+    Arguments
+    ---------
+    func : Callable
+        Function or coroutine which is "listable", i.e. given a list of input
+        parameters it will return a list of results.
+    path : str
+        The path of the Unix domain socket.
+    loop : EventLoop
+        The event loop on which the server runs. Uses
+        ``asyncio.get_event_loop()`` by default.
+    kwargs :
+        Keyword arguments passed to the :class:`.BatchSubmitter`.
+    """
+
+    def __init__(self, func, path, *, loop=None, **kwargs):
+        self._loop = loop or asyncio.get_event_loop()
+        self._path = path
+        self._submitter = BatchSubmitter(func, loop=self._loop, **kwargs)
+        self._server = None
+        self._connections = set()
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_unix_server(
+            self._handle_connection, path=self._path
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):  # pylint: disable=missing-docstring
+        self._server.close()
+        # The connections are closed first, since wait_closed() waits for
+        # all of them to finish on newer Python versions.
+        for task in self._connections:
+            task.cancel()
+        if self._connections:
+            await asyncio.wait(self._connections)
+        await self._server.wait_closed()
+        self._server = None
+        try:
+            os.unlink(self._path)
+        except FileNotFoundError:
+            pass
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Reads the inputs sent by a client, and submits them.
+        """
+        connection_task = asyncio.current_task()
+        self._connections.add(connection_task)
+        requests = set()
+        write_lock = asyncio.Lock()
+        try:
+            while True:
+                try:
+                    request_id, _, x = await _read_frame(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                task = self._loop.create_task(
+                    self._handle_request(request_id, x, writer, write_lock)
+                )
+                requests.add(task)
+                task.add_done_callback(requests.discard)
+            if requests:
+                await asyncio.wait(requests)
+        except asyncio.CancelledError:
+            # The server is closing. The handler returns normally, since the
+            # stream protocol logs an error for cancelled handlers.
+            pass
+        finally:
+            for task in requests:
+                task.cancel()
+            writer.close()
+            self._connections.discard(connection_task)
+
+    async def _handle_request(self, request_id, x, writer, write_lock):
+        """
+        Submits a single input, and sends back the result.
+        """
+        try:
+            frame = _encode_frame(
+                request_id, _STATUS_OK, await self._submitter(x)
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            frame = _encode_error(request_id, exc)
+        writer.write(frame)
+        async with write_lock:
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+
+@export
+class BatchClient:
+    """
+    Submits inputs to a :class:`.BatchServer` running in another process. It
+    can be used in the same way as a :class:`.BatchSubmitter`, by awaiting
+    ``client(x)``.
+
+    The connection is opened on the first call. The client can be used as
+    an asynchronous context manager, which closes the connection on exit.
+
+    Arguments
+    ---------
+    path : str
+        The path of the Unix domain socket on which the server listens.
+    loop : EventLoop
+        The event loop on which the client runs. Uses
+        ``asyncio.get_event_loop()`` by default.
+    """
+
+    def __init__(self, path, *, loop=None):
+        self._loop = loop or asyncio.get_event_loop()
+        self._path = path
+        self._counter = itertools.count()
+        self._pending = dict()
+        self._writer = None
+        self._read_task = None
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+    async def __call__(self, x):
+        """
+        Sends an input to the server, and waits for the result.
+        """
+        await self._connect()
+        request_id = next(self._counter)
+        fut = self._loop.create_future()
+        self._pending[request_id] = fut
+        try:
+            self._writer.write(_encode_frame(request_id, _STATUS_OK, x))
+            async with self._write_lock:
+                await self._writer.drain()
+            return await fut
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):  # pylint: disable=missing-docstring
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the connection to the server.
+        """
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except asyncio.CancelledError:
+                pass
+
+    async def _connect(self):
+        """
+        Opens the connection if it is not already open.
+        """
+        async with self._connect_lock:
+            if self._read_task is None or self._read_task.done():
+                reader, self._writer = await asyncio.open_unix_connection(
+                    self._path
+                )
+                self._read_task = self._loop.create_task(
+                    self._read_loop(reader)
+                )
+
+    async def _read_loop(self, reader):
+        """
+        Reads the results sent by the server, and assigns them to the
+        corresponding futures.
+        """
+        try:
+            while True:
+                request_id, status, obj = await _read_frame(reader)
+                fut = self._pending.get(request_id)
+                if fut is None or fut.done():
+                    continue
+                if status == _STATUS_OK:
+                    fut.set_result(obj)
+                else:
+                    fut.set_exception(obj)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writer.close()
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(
+                        ConnectionError('Connection to the server was lost.')
+                    )
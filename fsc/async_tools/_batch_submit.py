@@ -4,12 +4,16 @@ function into batches.
 """
 
 import sys
+import math
 import traceback
 import asyncio
 
 from fsc.export import export
 
-from . import wrap_to_coroutine
+from ._circuit_breaker import CircuitOpenError
+from ._wrap_to_coroutine import wrap_to_coroutine
+
+_BALANCE_POLICIES = ('least_outstanding', 'latency')
 
 
 @export
@@ -20,9 +24,11 @@ class BatchSubmitter:
 
     Arguments
     ---------
-    func: Callable
+    func: Callable or list(Callable)
         Function or coroutine which is "listable", i.e. given a list of input
-        parameters it will return a list of results.
+        parameters it will return a list of results. If a list of functions
+        is given, they are treated as replicas of the same function, and each
+        batch is submitted to one of them, as determined by ``balance``.
     loop: EventLoop
         The event loop on which the batch submitter runs. Uses
         ``asyncio.get_event_loop()`` by default.
@@ -38,6 +44,30 @@ class BatchSubmitter:
         specified explicitly.
     max_batch_size : int
         The maximum size of a batch that will be submitted.
+    retry_policy : RetryPolicy
+        If given, inputs whose batch failed are submitted again in a later
+        batch, as determined by the policy. The function can also mark
+        single inputs as failed by returning an exception instance in place
+        of their result, in which case only those inputs are submitted
+        again. Exceptions which are not retried are raised to the caller.
+    balance : str
+        Determines the replica to which a batch is submitted. With
+        ``'least_outstanding'``, the replica with the fewest running batches
+        is chosen. With ``'latency'``, the replica with the lowest
+        exponentially weighted moving average of the batch latency is chosen.
+    max_parallel_per_replica : int
+        The maximum number of batches which run in parallel on each replica.
+        If all replicas are busy, the next batch waits until one of them
+        finishes a batch.
+    eject_after : int
+        The number of consecutive failed batches after which a replica is
+        not used for ``eject_time``, unless all replicas have failed.
+    eject_time : float
+        The time for which a failing replica is not used.
+    circuit_breaker : CircuitBreaker
+        If given, inputs are rejected with a :class:`.CircuitOpenError`
+        while the circuit breaker is open, and the outcome of each batch is
+        recorded as a single call.
     """
 
     def __init__(
@@ -48,48 +78,89 @@ class BatchSubmitter:
         timeout=0.1,
         sleep_time=0.,
         wait_batch_size=None,
-        max_batch_size=1000
+        max_batch_size=1000,
+        retry_policy=None,
+        balance='least_outstanding',
+        max_parallel_per_replica=None,
+        eject_after=3,
+        eject_time=10.,
+        circuit_breaker=None
     ):
-        self._func = wrap_to_coroutine(func)
+        if callable(func):
+            func = [func]
+        self._replicas = [_Replica(f) for f in func]
+        if not self._replicas:
+            raise ValueError('At least one function must be given.')
+        if balance not in _BALANCE_POLICIES:
+            raise ValueError(
+                "Invalid balance policy '{}', must be one of {}.".format(
+                    balance, _BALANCE_POLICIES
+                )
+            )
+        self._balance = balance
+        if (
+            max_parallel_per_replica is not None
+            and max_parallel_per_replica <= 0
+        ):
+            raise ValueError('max_parallel_per_replica must be positive')
+        self._max_parallel_per_replica = max_parallel_per_replica
+        self._eject_after = eject_after
+        self._eject_time = eject_time
         self._loop = loop or asyncio.get_event_loop()
-        self._timeout = timeout
-        self._sleep_time = sleep_time
-
-        if max_batch_size <= 0:
-            raise ValueError('max_batch_size must be positive')
-        self._max_batch_size = max_batch_size
-        if wait_batch_size is None:
-            wait_batch_size = self._max_batch_size
-        if wait_batch_size <= 0:
-            raise ValueError('wait_batch_size must be positive')
-        self._wait_batch_size = wait_batch_size
+        self._collector = _BatchCollector(
+            timeout=timeout,
+            sleep_time=sleep_time,
+            wait_batch_size=wait_batch_size,
+            max_batch_size=max_batch_size
+        )
+        self._retry_policy = retry_policy
+        self._circuit_breaker = circuit_breaker
 
         self._tasks = asyncio.Queue()
         self._batches = dict()
         self._submit_loop_task = None
         self._last_call_time = None
+        self._replica_freed = None
 
     async def __call__(self, x):
         """
         Adds a task for the given input, and starts the submission loop if needed.
         """
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.check()
         fut = self._loop.create_future()
-        self._tasks.put_nowait((x, fut))
+        if self._retry_policy is not None:
+            self._retry_policy.record_call()
+        self._enqueue(x, fut, num_attempts=0)
+        return await fut
+
+    def _enqueue(self, x, fut, num_attempts):
+        """
+        Adds an input to the queue, and starts the submission loop if needed.
+        """
+        if fut.done():
+            # The caller was cancelled while waiting for a retry.
+            return
+        self._tasks.put_nowait((x, fut, num_attempts))
         self._last_call_time = self._loop.time()
         if self._submit_loop_task is None or self._submit_loop_task.done():
             self._submit_loop_task = asyncio.Task(
                 self._submit_loop(), loop=self._loop
             )
             self._submit_loop_task.add_done_callback(self._abort_on_exception)
-        return await fut
 
     async def _submit_loop(self):
         """
         Waits for tasks and then creates the batches which evaluate the function.
         """
         while self._tasks.qsize() > 0:
-            await self._wait_for_tasks()
-            self._launch_batch()
+            await self._collector.wait(
+                self._tasks,
+                loop=self._loop,
+                get_start_time=lambda: self._last_call_time
+            )
+            replica = await self._wait_for_replica()
+            self._launch_batch(replica)
 
     @staticmethod
     def _abort_on_exception(fut):
@@ -101,43 +172,209 @@ class BatchSubmitter:
         except Exception:  # pylint: disable=broad-except
             sys.exit(''.join(traceback.format_exception(*sys.exc_info())))
 
-    async def _wait_for_tasks(self):
+    async def _wait_for_replica(self):
         """
-        Waits until either the timeout has passed or the queue size is big enough.
+        Waits until a replica can take another batch, and returns it.
         """
-        assert self._tasks.qsize() > 0
-        while self._loop.time() - self._last_call_time < self._timeout:
-            if self._tasks.qsize() >= self._wait_batch_size:
-                return
-            await asyncio.sleep(self._sleep_time)
+        while True:
+            replica = self._select_replica()
+            if replica is not None:
+                return replica
+            self._replica_freed = self._loop.create_future()
+            await self._replica_freed
+
+    def _select_replica(self):
+        """
+        Returns the replica to which the next batch is submitted, or ``None``
+        if all replicas are busy.
+        """
+        available = [
+            replica for replica in self._replicas
+            if self._max_parallel_per_replica is None
+            or replica.num_outstanding < self._max_parallel_per_replica
+        ]
+        if not available:
+            return None
+        now = self._loop.time()
+        # Fall back to the failing replicas if no other one is available.
+        candidates = [
+            replica for replica in available if replica.ejected_until <= now
+        ] or available
+        if self._balance == 'latency':
+            return min(
+                candidates, key=lambda r: (r.get_latency(), r.num_outstanding)
+            )
+        return min(
+            candidates, key=lambda r: (r.num_outstanding, r.get_latency())
+        )
 
-    def _launch_batch(self):
+    def _launch_batch(self, replica):
         """
-        Launch a calculation batch.
+        Launch a calculation batch on the given replica.
         """
         inputs = []
-        futures = []
-        for _ in range(self._max_batch_size):
-            try:
-                key, fut = self._tasks.get_nowait()
+        tasks = []
+        for key, fut, num_attempts in self._collector.take(self._tasks):
+            # Skip the inputs whose caller was cancelled.
+            if not fut.done():
                 inputs.append(key)
-                futures.append(fut)
-            except asyncio.QueueEmpty:
-                break
-        task = asyncio.ensure_future(self._func(inputs))
+                tasks.append((key, fut, num_attempts + 1))
+        if not tasks:
+            return
+        is_probe = False
+        if self._circuit_breaker is not None:
+            try:
+                is_probe = self._circuit_breaker.start_call()
+            except CircuitOpenError as exc:
+                for _, fut, _ in tasks:
+                    fut.set_exception(exc)
+                return
+        replica.num_outstanding += 1
+        task = asyncio.ensure_future(replica.func(inputs))
         task.add_done_callback(self._process_finished_batch)
-        self._batches[task] = futures
+        self._batches[task] = (tasks, replica, self._loop.time(), is_probe)
 
     def _process_finished_batch(self, batch_future):
         """
         Assign the results / exceptions to the futures of all finished batches.
         """
-        task_futures = self._batches.pop(batch_future)
+        tasks, replica, start_time, is_probe = self._batches.pop(batch_future)
         try:
             results = batch_future.result()
-            assert len(results) == len(task_futures)
-            for fut, res in zip(task_futures, results):
-                fut.set_result(res)
+            assert len(results) == len(tasks)
         except Exception as exc:  # pylint: disable=broad-except
-            for fut in task_futures:
-                fut.set_exception(exc)
+            if self._circuit_breaker is not None:
+                self._circuit_breaker.finish_call(is_probe, exc=exc)
+            self._update_replica(replica, start_time, success=False)
+            for task in tasks:
+                self._process_failed_task(*task, exc=exc)
+            return
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.finish_call(is_probe)
+        self._update_replica(replica, start_time, success=True)
+        for (x, fut, num_attempts), res in zip(tasks, results):
+            if self._retry_policy is not None and isinstance(res, Exception):
+                self._process_failed_task(x, fut, num_attempts, exc=res)
+            elif not fut.done():
+                fut.set_result(res)
+
+    def _update_replica(self, replica, start_time, *, success):
+        """
+        Updates the statistics of a replica which finished a batch.
+        """
+        now = self._loop.time()
+        replica.num_outstanding -= 1
+        if success:
+            replica.num_failures = 0
+            replica.ejected_until = -math.inf
+            replica.update_latency(now - start_time)
+        else:
+            replica.num_failures += 1
+            if replica.num_failures >= self._eject_after:
+                replica.ejected_until = now + self._eject_time
+        if self._replica_freed is not None and not self._replica_freed.done():
+            self._replica_freed.set_result(None)
+
+    def _process_failed_task(self, x, fut, num_attempts, *, exc):
+        """
+        Submits a failed input again if the retry policy allows it, and
+        otherwise sets the exception on its future.
+        """
+        if fut.done():
+            return
+        if self._retry_policy is not None and self._retry_policy.should_retry(
+            exc, num_attempts
+        ):
+            self._loop.call_later(
+                self._retry_policy.get_delay(num_attempts), self._enqueue, x,
+                fut, num_attempts
+            )
+        else:
+            fut.set_exception(exc)
+
+
+class _BatchCollector:
+    """
+    Batch size and timeout settings, and the logic to collect a batch from a
+    queue. Used by the :class:`.BatchSubmitter` and the stages of a
+    :class:`.BatchPipeline`.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout=0.1,
+        sleep_time=0.,
+        wait_batch_size=None,
+        max_batch_size=1000
+    ):
+        self.timeout = timeout
+        self.sleep_time = sleep_time
+
+        if max_batch_size <= 0:
+            raise ValueError('max_batch_size must be positive')
+        self.max_batch_size = max_batch_size
+        if wait_batch_size is None:
+            wait_batch_size = self.max_batch_size
+        if wait_batch_size <= 0:
+            raise ValueError('wait_batch_size must be positive')
+        self.wait_batch_size = wait_batch_size
+
+    async def wait(self, queue, *, loop, get_start_time, num_taken=0):
+        """
+        Waits until either the timeout has passed since ``get_start_time()``,
+        or the queue (together with ``num_taken`` inputs which were already
+        taken from it) is big enough.
+        """
+        while loop.time() - get_start_time() < self.timeout:
+            if num_taken + queue.qsize() >= self.wait_batch_size:
+                return
+            await asyncio.sleep(self.sleep_time)
+
+    def take(self, queue, batch=None):
+        """
+        Takes inputs from the queue until the batch has the maximum size or
+        the queue is empty, and returns the batch.
+        """
+        batch = [] if batch is None else batch
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+
+class _Replica:
+    """
+    Replica of the listable function, with the statistics used to choose
+    to which replica a batch is submitted.
+    """
+
+    _EWMA_WEIGHT = 0.3
+
+    def __init__(self, func):
+        self.func = wrap_to_coroutine(func)
+        self.num_outstanding = 0
+        self.num_failures = 0
+        self.ejected_until = -math.inf
+        self._latency = None
+
+    def get_latency(self):
+        """
+        Returns the moving average of the latency. Replicas without a
+        measurement are preferred while they are idle, such that all replicas
+        are tried, but avoided while their first batch is running.
+        """
+        if self._latency is None:
+            return 0. if self.num_outstanding == 0 else math.inf
+        return self._latency
+
+    def update_latency(self, latency):
+        """
+        Updates the moving average of the latency with a new measurement.
+        """
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += self._EWMA_WEIGHT * (latency - self._latency)
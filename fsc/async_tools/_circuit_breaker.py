@@ -0,0 +1,213 @@
+"""
+Defines a circuit breaker, which rejects calls to a function or coroutine
+while it is failing.
+"""
+
+import asyncio
+from collections import deque
+from functools import wraps
+
+from fsc.export import export
+
+from ._wrap_to_coroutine import wrap_to_coroutine
+
+
+@export
+class CircuitOpenError(Exception):
+    """
+    Raised when a call is rejected because the circuit breaker is open.
+    """
+
+
+@export
+class CircuitBreaker:
+    """
+    Decorator that stops calls to a function or coroutine while a large
+    fraction of its recent calls have failed.
+
+    The circuit breaker starts out ``'closed'``, where all calls are let
+    through. When the fraction of failed calls in the window exceeds
+    ``failure_threshold``, it switches to ``'open'``, and calls immediately
+    raise a :class:`.CircuitOpenError`. After ``reset_timeout``, it becomes
+    ``'half-open'``: up to ``half_open_max_calls`` probe calls are let
+    through. If all of them succeed, the circuit breaker is closed again;
+    if any of them fails, it is opened again.
+
+    The same circuit breaker can decorate several functions, which then
+    share their state. When used with :func:`.limit_parallel`, the circuit
+    breaker should be applied inside the limit, such that calls which are
+    already waiting for a slot are rejected as soon as they are admitted,
+    and :meth:`guard` outside of it, such that new calls are rejected
+    without waiting for a slot. For a :class:`.BatchSubmitter`, the circuit
+    breaker should be passed as its ``circuit_breaker`` argument, such that
+    each batch counts as a single call.
+
+    Arguments
+    ---------
+    failure_threshold : float
+        The fraction of failed calls above which the circuit breaker opens.
+    window_size : int
+        The number of most recent calls for which the failures are counted.
+    min_calls : int
+        The minimum number of calls in the window before the circuit breaker
+        can open.
+    reset_timeout : float
+        The time after which an open circuit breaker becomes half-open.
+    half_open_max_calls : int
+        The number of probe calls in the half-open state.
+    failure_on : type or tuple
+        The exception types which count as a failure. Other exceptions are
+        raised without counting as a failure.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(
+        self,
+        *,
+        failure_threshold=0.5,
+        window_size=20,
+        min_calls=10,
+        reset_timeout=30.,
+        half_open_max_calls=1,
+        failure_on=Exception
+    ):
+        if not 0 <= failure_threshold <= 1:
+            raise ValueError('failure_threshold must be between 0 and 1')
+        if half_open_max_calls <= 0:
+            raise ValueError('half_open_max_calls must be positive')
+        self._failure_threshold = failure_threshold
+        self._min_calls = min_calls
+        self._reset_timeout = reset_timeout
+        self._half_open_max_calls = half_open_max_calls
+        self._failure_on = failure_on
+
+        self._outcomes = deque(maxlen=window_size)
+        self._num_failures = 0
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._num_probes = 0
+        self._num_probe_successes = 0
+
+    @property
+    def state(self):
+        """
+        The current state of the circuit breaker.
+        """
+        if self._state == self.OPEN and self._time(
+        ) - self._opened_at >= self._reset_timeout:
+            self._state = self.HALF_OPEN
+            self._num_probes = 0
+            self._num_probe_successes = 0
+        return self._state
+
+    def __call__(self, func):
+        func_wrapped = wrap_to_coroutine(func)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):  # pylint: disable=missing-docstring
+            is_probe = self.start_call()
+            try:
+                res = await func_wrapped(*args, **kwargs)
+            except BaseException as exc:
+                self.finish_call(is_probe, exc=exc)
+                raise
+            self.finish_call(is_probe)
+            return res
+
+        return inner
+
+    def guard(self, func):
+        """
+        Decorator that rejects calls to a function or coroutine while the
+        circuit breaker would reject them, without recording their outcome.
+        This is used to reject calls before they wait for a slot of
+        :func:`.limit_parallel`.
+        """
+        func_wrapped = wrap_to_coroutine(func)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):  # pylint: disable=missing-docstring
+            self.check()
+            return await func_wrapped(*args, **kwargs)
+
+        return inner
+
+    def check(self):
+        """
+        Raises a :class:`.CircuitOpenError` if a call made now would be
+        rejected.
+        """
+        state = self.state
+        if state == self.OPEN or (
+            state == self.HALF_OPEN
+            and self._num_probes >= self._half_open_max_calls
+        ):
+            raise CircuitOpenError('The circuit breaker is {}.'.format(state))
+
+    def start_call(self):
+        """
+        Checks if a call is allowed, and records its start. Returns whether
+        the call is a probe, which must be passed to :meth:`finish_call`.
+        """
+        self.check()
+        if self.state == self.HALF_OPEN:
+            self._num_probes += 1
+            return True
+        return False
+
+    def finish_call(self, is_probe, *, exc=None):
+        """
+        Records the outcome of a call started with :meth:`start_call`. The
+        call failed if ``exc`` is an instance of the ``failure_on`` types.
+        Cancelled calls are not recorded.
+        """
+        if isinstance(exc, asyncio.CancelledError):
+            if is_probe:
+                self._num_probes -= 1
+            return
+        self._record(
+            success=not isinstance(exc, self._failure_on), is_probe=is_probe
+        )
+
+    @staticmethod
+    def _time():
+        return asyncio.get_event_loop().time()
+
+    def _record(self, *, success, is_probe):
+        """
+        Records the outcome of a call, and updates the state.
+        """
+        if is_probe:
+            if self._state != self.HALF_OPEN:
+                return
+            if success:
+                self._num_probe_successes += 1
+                if self._num_probe_successes >= self._half_open_max_calls:
+                    self._close()
+            else:
+                self._open()
+            return
+        if self._state != self.CLOSED:
+            # Outcome of a call started before the circuit breaker opened.
+            return
+        if len(self._outcomes) == self._outcomes.maxlen:
+            self._num_failures -= not self._outcomes[0]
+        self._outcomes.append(success)
+        self._num_failures += not success
+        if (
+            len(self._outcomes) >= self._min_calls and
+            self._num_failures > self._failure_threshold * len(self._outcomes)
+        ):
+            self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self._time()
+
+    def _close(self):
+        self._state = self.CLOSED
+        self._outcomes.clear()
+        self._num_failures = 0
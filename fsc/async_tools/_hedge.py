@@ -0,0 +1,107 @@
+"""
+Defines a decorator which sends a duplicate call when the original call is
+slow, to reduce the tail latency.
+"""
+
+import asyncio
+from functools import wraps
+
+from fsc.export import export
+
+from ._retry import RetryBudget
+from ._stats import SlidingWindow
+from ._wrap_to_coroutine import wrap_to_coroutine
+
+
+@export
+def hedge(
+    delay=None, *, quantile=0.95, window=1000, min_samples=20, budget=None
+):
+    """
+    Decorator that starts a second, identical call to a function or coroutine
+    if the first one has not finished after a given delay. The result of the
+    call which finishes first is returned, and the other call is cancelled.
+    If one of the calls raises an exception, the result of the other one is
+    used instead.
+
+    This should only be used on functions which are safe to call twice.
+
+    Arguments
+    ---------
+    delay : float
+        The time after which the second call is started. If not given, the
+        ``quantile`` of the latencies observed so far is used.
+    quantile : float
+        The quantile of the observed latencies which is used as delay if no
+        fixed delay is given.
+    window : int
+        The number of recent latencies from which the quantile is computed.
+    min_samples : int
+        The number of latencies which must be observed before calls are
+        hedged, if no fixed delay is given.
+    budget : RetryBudget
+        Limits the number of extra calls. Uses a budget of ten percent of
+        the calls by default.
+    """
+    if not 0 < quantile < 1:
+        raise ValueError('quantile must be between 0 and 1')
+
+    def decorator(func):  # pylint: disable=missing-docstring
+        func_wrapped = wrap_to_coroutine(func)
+        latencies = SlidingWindow(window)
+        hedge_budget = RetryBudget(ratio=0.1) if budget is None else budget
+
+        def get_delay():  # pylint: disable=missing-docstring
+            if delay is not None:
+                return delay
+            if len(latencies) < min_samples:
+                return None
+            return latencies.percentile(100 * quantile)
+
+        async def hedged_call(loop, args, kwargs):
+            """
+            Runs the call, and starts the hedged call if needed.
+            """
+            hedge_budget.deposit()
+            pending = {loop.create_task(func_wrapped(*args, **kwargs))}
+            hedge_delay = get_delay()
+            exception = None
+            try:
+                if hedge_delay is not None:
+                    done, pending = await asyncio.wait(
+                        pending, timeout=hedge_delay
+                    )
+                    for task in done:
+                        return task.result()
+                    if hedge_budget.withdraw():
+                        pending.add(
+                            loop.create_task(func_wrapped(*args, **kwargs))
+                        )
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if task.exception() is None:
+                            return task.result()
+                        if exception is None:
+                            exception = task.exception()
+                raise exception
+            finally:
+                for task in pending:
+                    task.cancel()
+
+        @wraps(func)
+        async def inner(*args, **kwargs):  # pylint: disable=missing-docstring
+            loop = asyncio.get_event_loop()
+            start = loop.time()
+            res = await hedged_call(loop, args, kwargs)
+            # The latency is measured from the caller's side. Otherwise, only
+            # the fast calls would be recorded once calls are hedged, and
+            # the delay would keep drifting down.
+            latencies.add(loop.time() - start)
+            return res
+
+        return inner
+
+    return decorator
@@ -3,39 +3,179 @@ Defines a decorator that limits the number of parallel calls to a function
 or coroutine.
 """
 
+import heapq
 import asyncio
+import itertools
+from collections import deque
 from functools import wraps
 
 from fsc.export import export
 
-from . import wrap_to_coroutine
+from ._wrap_to_coroutine import wrap_to_coroutine
 
 
 @export
-def limit_parallel(max_num_parallel):
+def limit_parallel(
+    max_num_parallel, *, priority=None, min_share=0., weight=None
+):
     """
     Decorator that limits the number of parallel calls to a function or coroutine.
 
     Arguments
     ---------
     max_num_parallel : int
-        The maximum number of calls which can run in parallel.
+        The maximum number of calls which can run in parallel. If ``weight``
+        is given, this is the total weight of the calls which can run in
+        parallel.
+    priority : Callable
+        Function which is called with the same arguments as the decorated
+        function, and returns the priority of the call. When the limit is
+        reached, calls with a higher priority are admitted first. Calls with
+        the same priority are admitted in the order they were made. If not
+        given, all calls are admitted in FIFO order.
+    min_share : float
+        Fraction of the admissions which are given to the longest-waiting
+        call regardless of its priority. This guarantees that calls with low
+        priority still get a minimum share of the slots.
+    weight : Callable
+        Function which is called with the same arguments as the decorated
+        function, and returns the number of slots the call uses. A call
+        which is next in line blocks the calls behind it until enough slots
+        are free, such that heavy calls are not overtaken by lighter ones.
+        If not given, each call uses one slot.
     """
+    if not 0 <= min_share <= 1:
+        raise ValueError('min_share must be between 0 and 1')
 
     def decorator(func):  # pylint: disable=missing-docstring
-        semaphore = asyncio.Semaphore(value=max_num_parallel)
+        limiter = _PriorityLimiter(max_num_parallel, min_share=min_share)
         func_wrapped = wrap_to_coroutine(func)
 
         @wraps(func)
         async def inner(*args, **kwargs):  # pylint: disable=missing-docstring
-            nonlocal semaphore
-            await semaphore.acquire()
+            if priority is None:
+                call_priority = 0
+            else:
+                call_priority = priority(*args, **kwargs)
+            if weight is None:
+                call_weight = 1
+            else:
+                call_weight = weight(*args, **kwargs)
+            await limiter.acquire(priority=call_priority, weight=call_weight)
             try:
                 res = await func_wrapped(*args, **kwargs)
             finally:
-                semaphore.release()
+                limiter.release(weight=call_weight)
             return res
 
         return inner
 
     return decorator
+
+
+class _PriorityLimiter:
+    """
+    Semaphore which admits waiters by priority, and in FIFO order amongst
+    waiters of equal priority. A fraction ``min_share`` of the admissions
+    is given to the longest-waiting call instead. Each waiter can acquire
+    more than one slot, in which case it blocks the waiters behind it until
+    enough slots are free.
+    """
+
+    def __init__(self, value, *, min_share=0.):
+        self._max_value = value
+        self._value = value
+        self._min_share = min_share
+        self._share_credit = 0.
+        self._counter = itertools.count()
+        # The FIFO queue is only filled if min_share is non-zero. Admitted
+        # or cancelled entries are removed lazily from both queues.
+        self._heap = []
+        self._fifo = deque()
+        self._num_waiting = 0
+
+    async def acquire(self, priority=0, weight=1):
+        """
+        Waits until enough slots are free and this call is next in line.
+        """
+        if not 0 < weight <= self._max_value:
+            raise ValueError(
+                'Call weight {} must be positive and at most {}.'.format(
+                    weight, self._max_value
+                )
+            )
+        if self._num_waiting == 0 and self._value >= weight:
+            self._value -= weight
+            return
+        fut = asyncio.get_event_loop().create_future()
+        entry = (-priority, next(self._counter), weight, fut)
+        heapq.heappush(self._heap, entry)
+        if self._min_share > 0:
+            self._fifo.append(entry)
+        self._num_waiting += 1
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # The slots were already handed to this call.
+                self.release(weight=weight)
+            else:
+                fut.cancel()
+                self._num_waiting -= 1
+                # This call may have blocked lighter calls behind it.
+                self._wake_waiters()
+            raise
+
+    def release(self, weight=1):
+        """
+        Frees the given number of slots, and admits the next waiters if
+        possible.
+        """
+        self._value += weight
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        """
+        Admits waiters for as long as the next one in line fits.
+        """
+        while self._num_waiting > 0:
+            use_fifo = self._share_credit >= 1.
+            entry = self._peek_next(use_fifo=use_fifo)
+            weight = entry[2]
+            if weight > self._value:
+                break
+            if use_fifo:
+                self._fifo.popleft()
+                self._share_credit -= 1.
+            else:
+                heapq.heappop(self._heap)
+            self._share_credit += self._min_share
+            self._num_waiting -= 1
+            self._value -= weight
+            entry[-1].set_result(None)
+        self._compact()
+
+    def _peek_next(self, *, use_fifo):
+        """
+        Returns the next waiting entry, either from the priority queue or
+        from the FIFO queue.
+        """
+        if use_fifo:
+            queue = self._fifo
+            while queue[0][-1].done():
+                queue.popleft()
+        else:
+            queue = self._heap
+            while queue[0][-1].done():
+                heapq.heappop(queue)
+        return queue[0]
+
+    def _compact(self):
+        """
+        Drops stale entries once they make up the majority of the queues.
+        """
+        if len(self._heap) > 2 * self._num_waiting + 16:
+            self._heap = [e for e in self._heap if not e[-1].done()]
+            heapq.heapify(self._heap)
+        if len(self._fifo) > 2 * self._num_waiting + 16:
+            self._fifo = deque(e for e in self._fifo if not e[-1].done())
@@ -0,0 +1,96 @@
+"""
+Defines an asynchronous context manager for measuring the scheduling delay
+of the event loop.
+"""
+
+import asyncio
+
+from fsc.export import export
+
+from ._stats import SlidingWindow
+from ._periodic_task import PeriodicTask
+
+
+@export
+class LoopLagMonitor:
+    """
+    Asynchronous context manager that measures how late the event loop runs
+    scheduled callbacks. The lag is large when callbacks block the event loop
+    for a long time, or when the event loop is overloaded.
+
+    The monitor uses a :class:`.PeriodicTask`, and measures by how much the
+    time between two of its calls exceeds the given interval.
+
+    Arguments
+    ---------
+    loop : EventLoop
+        The event loop which is monitored. Uses :func:`asyncio.get_event_loop()` if no event loop is specified.
+    interval : float
+        The time between two measurements.
+    window : int
+        The number of most recent measurements which are kept.
+    slow_threshold : float
+        If given, lags above this threshold are counted as slow.
+    on_slow : Callable
+        Function which is called with the lag when a slow lag is measured.
+    """
+
+    def __init__(
+        self,
+        *,
+        loop=None,
+        interval=0.1,
+        window=1000,
+        slow_threshold=None,
+        on_slow=None
+    ):
+        if loop is None:
+            self._loop = asyncio.get_event_loop()
+        else:
+            self._loop = loop
+        self._interval = interval
+        self._slow_threshold = slow_threshold
+        self._on_slow = on_slow
+        self._lags = SlidingWindow(window)
+        self._last_time = None
+        self._periodic_task = PeriodicTask(
+            self._measure, loop=self._loop, delay=interval, run_on_exit=False
+        )
+        self.num_slow = 0
+
+    async def __aenter__(self):
+        self._last_time = None
+        await self._periodic_task.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):  # pylint: disable=missing-docstring
+        await self._periodic_task.__aexit__(exc_type, exc_value, traceback)
+
+    def __len__(self):
+        return len(self._lags)
+
+    def percentiles(self, percents=(50, 90, 99, 100)):
+        """
+        Returns a dict mapping each of the given percentiles to the
+        corresponding lag.
+        """
+        if not len(self._lags):  # pylint: disable=len-as-condition
+            raise ValueError('No lag has been measured yet.')
+        return {
+            percent: self._lags.percentile(percent)
+            for percent in percents
+        }
+
+    def _measure(self):
+        """
+        Records the lag since the previous measurement.
+        """
+        now = self._loop.time()
+        if self._last_time is not None:
+            lag = max(now - self._last_time - self._interval, 0.)
+            self._lags.add(lag)
+            if self._slow_threshold is not None and lag > self._slow_threshold:
+                self.num_slow += 1
+                if self._on_slow is not None:
+                    self._on_slow(lag)
+        self._last_time = now
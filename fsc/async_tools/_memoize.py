@@ -0,0 +1,114 @@
+"""
+Defines a decorator for caching the results of a function or coroutine.
+"""
+
+import asyncio
+from functools import wraps
+from collections import OrderedDict
+
+from fsc.export import export
+
+from ._wrap_to_coroutine import wrap_to_coroutine
+
+# Separates the positional from the keyword arguments in cache keys, such
+# that they cannot be confused with each other.
+_KWARGS_MARK = object()
+
+
+@export
+def memoize(*, maxsize=128, ttl=None, stale_ttl=0., key=None):
+    """
+    Decorator that caches the results of a function or coroutine.
+
+    Concurrent calls with the same key share a single call to the function.
+    Exceptions are not cached. When an entry is older than ``ttl`` but
+    younger than ``ttl + stale_ttl``, the cached result is still returned,
+    and the entry is refreshed in the background.
+
+    The decorated coroutine function has a ``cache_clear`` method which
+    removes all cached results.
+
+    Arguments
+    ---------
+    maxsize : int
+        The maximum number of cached results. When it is exceeded, the least
+        recently used result is dropped. If ``None``, the cache is unbounded.
+    ttl : float
+        The time after which a cached result is stale. If ``None``, results
+        do not become stale.
+    stale_ttl : float
+        The time after ``ttl`` during which a stale result is returned while
+        it is refreshed.
+    key : Callable
+        Function which is called with the same arguments as the decorated
+        function, and returns the (hashable) cache key. By default, the
+        positional and keyword arguments are used.
+    """
+    if maxsize is not None and maxsize <= 0:
+        raise ValueError('maxsize must be positive')
+
+    def decorator(func):  # pylint: disable=missing-docstring
+        func_wrapped = wrap_to_coroutine(func)
+        # Maps keys to (result, time) tuples, in order of last use.
+        cache = OrderedDict()
+        in_flight = {}
+
+        def get_key(args, kwargs):  # pylint: disable=missing-docstring
+            if key is not None:
+                return key(*args, **kwargs)
+            if kwargs:
+                return args + (_KWARGS_MARK, ) + tuple(sorted(kwargs.items()))
+            return args
+
+        def start_call(cache_key, args, kwargs):
+            """
+            Returns the in-flight call for the given key, starting it if
+            needed.
+            """
+            task = in_flight.get(cache_key)
+            if task is None:
+                loop = asyncio.get_event_loop()
+                task = loop.create_task(func_wrapped(*args, **kwargs))
+                in_flight[cache_key] = task
+                task.add_done_callback(
+                    lambda task: finish_call(cache_key, task, loop)
+                )
+            return task
+
+        def finish_call(cache_key, task, loop):
+            """
+            Stores the result of a finished call in the cache.
+            """
+            del in_flight[cache_key]
+            if task.cancelled() or task.exception() is not None:
+                return
+            cache[cache_key] = (task.result(), loop.time())
+            cache.move_to_end(cache_key)
+            if maxsize is not None and len(cache) > maxsize:
+                cache.popitem(last=False)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):  # pylint: disable=missing-docstring
+            cache_key = get_key(args, kwargs)
+            try:
+                res, stored_at = cache[cache_key]
+            except KeyError:
+                pass
+            else:
+                age = asyncio.get_event_loop().time() - stored_at
+                if ttl is None or age < ttl:
+                    cache.move_to_end(cache_key)
+                    return res
+                if age < ttl + stale_ttl:
+                    cache.move_to_end(cache_key)
+                    start_call(cache_key, args, kwargs)
+                    return res
+                del cache[cache_key]
+            # The call is shielded, such that cancelling one caller does not
+            # cancel the call for the others.
+            return await asyncio.shield(start_call(cache_key, args, kwargs))
+
+        inner.cache_clear = cache.clear
+        return inner
+
+    return decorator
@@ -0,0 +1,237 @@
+"""
+Defines an asynchronous context manager which runs many periodic functions
+from a single timer.
+"""
+
+import heapq
+import random
+import asyncio
+import inspect
+import itertools
+
+from fsc.export import export
+
+
+@export
+class PeriodicScheduler:
+    """Asynchronous context manager that runs many periodic functions from a
+    single timer on the event loop.
+
+    Compared to using a :class:`.PeriodicTask` for each function, this avoids
+    creating a separate task and sleep loop per function. Adding a function
+    and rescheduling it are :math:`O(\\log n)`, removing it is :math:`O(1)`.
+
+    If a function raises an exception, it is removed from the scheduler and
+    the exception is raised when exiting the context manager.
+
+    Arguments
+    ---------
+    loop : EventLoop
+        The event loop on which the functions are executed. Uses :func:`asyncio.get_event_loop()` if no event loop is specified.
+    """
+
+    def __init__(self, *, loop=None):
+        if loop is None:
+            self._loop = asyncio.get_event_loop()
+        else:
+            self._loop = loop
+        self._counter = itertools.count()
+        # Heap of [deadline, count, job] entries. Entries of removed or
+        # rescheduled jobs are invalidated by setting the job to None.
+        self._heap = []
+        self._num_stale = 0
+        self._timer = None
+        self._running = False
+        self._dispatching = False
+        self._runs = set()
+        self._exception = None
+
+    def add(self, func, delay, *, jitter=0.):
+        """
+        Adds a function which is run periodically, with the first call made
+        immediately.
+
+        Arguments
+        ---------
+        func : Callable
+            The function or coroutine which is executed. It cannot take any
+            arguments.
+        delay : float
+            The minimum time between the end of one call and the start of
+            the next.
+        jitter : float
+            Maximum random time which is added to each delay, to spread out
+            the calls of functions with the same delay.
+
+        Returns
+        -------
+        The handle of the job, which can be passed to :meth:`remove` and
+        :meth:`reschedule`.
+        """
+        job = _Job(func, delay=delay, jitter=jitter)
+        self._schedule(job, self._loop.time() + job.get_jitter())
+        return job
+
+    def remove(self, job):
+        """
+        Removes a function from the scheduler. A call which is currently
+        running is not interrupted.
+        """
+        job.active = False
+        self._invalidate(job)
+
+    def reschedule(self, job, delay=None, *, jitter=None):
+        """
+        Changes the delay of a function, and schedules its next call one
+        (new) delay from now.
+        """
+        if not job.active:
+            raise ValueError('The job has been removed from the scheduler.')
+        if delay is not None:
+            job.delay = float(delay)
+        if jitter is not None:
+            job.jitter = float(jitter)
+        if job.entry is not None:
+            self._invalidate(job)
+            self._schedule(job, self._loop.time() + job.get_delay())
+
+    async def __aenter__(self):
+        self._running = True
+        self._arm_timer()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):  # pylint: disable=missing-docstring
+        self._running = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._runs:
+            await asyncio.wait(list(self._runs))
+        exception, self._exception = self._exception, None
+        if exception is not None:
+            raise exception
+
+    def _schedule(self, job, deadline):
+        """
+        Adds the next call of a job to the heap, and re-arms the timer if
+        the call is due before the current timer.
+        """
+        entry = [deadline, next(self._counter), job]
+        job.entry = entry
+        heapq.heappush(self._heap, entry)
+        if self._dispatching:
+            # The timer is re-armed once all due calls are made.
+            return
+        if self._timer is None or deadline < self._timer.when():
+            self._arm_timer()
+
+    def _invalidate(self, job):
+        """
+        Marks the scheduled call of a job as stale.
+        """
+        if job.entry is not None:
+            job.entry[-1] = None
+            job.entry = None
+            self._num_stale += 1
+            if self._num_stale > len(self._heap) // 2 + 16:
+                self._heap = [e for e in self._heap if e[-1] is not None]
+                heapq.heapify(self._heap)
+                self._num_stale = 0
+
+    def _arm_timer(self):
+        """
+        Sets the timer to the deadline of the earliest scheduled call.
+        """
+        if not self._running:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._heap and self._heap[0][-1] is None:
+            heapq.heappop(self._heap)
+            self._num_stale -= 1
+        if self._heap:
+            self._timer = self._loop.call_at(self._heap[0][0], self._on_timer)
+
+    def _on_timer(self):
+        """
+        Runs all the functions which are due.
+        """
+        self._timer = None
+        self._dispatching = True
+        try:
+            now = self._loop.time()
+            while self._heap and self._heap[0][0] <= now:
+                job = heapq.heappop(self._heap)[-1]
+                if job is None:
+                    self._num_stale -= 1
+                    continue
+                job.entry = None
+                self._run(job)
+        finally:
+            self._dispatching = False
+        self._arm_timer()
+
+    def _run(self, job):
+        """
+        Runs a single job, and schedules its next call once it is done.
+        """
+        try:
+            res = job.func()
+        except Exception as exc:  # pylint: disable=broad-except
+            self._fail(job, exc)
+            return
+        if inspect.isawaitable(res):
+            run = asyncio.ensure_future(res, loop=self._loop)
+            self._runs.add(run)
+            run.add_done_callback(lambda fut: self._finish_run(job, fut))
+        elif job.active:
+            self._schedule(job, self._loop.time() + job.get_delay())
+
+    def _finish_run(self, job, fut):
+        """
+        Callback for coroutine jobs, which schedules the next call.
+        """
+        self._runs.discard(fut)
+        if fut.cancelled():
+            return
+        exc = fut.exception()
+        if exc is not None:
+            self._fail(job, exc)
+        elif job.active:
+            self._schedule(job, self._loop.time() + job.get_delay())
+
+    def _fail(self, job, exc):
+        """
+        Removes a job which raised an exception, and stores the exception.
+        """
+        job.active = False
+        if self._exception is None:
+            self._exception = exc
+
+
+class _Job:
+    """
+    Periodic function managed by a :class:`PeriodicScheduler`.
+    """
+
+    def __init__(self, func, *, delay, jitter):
+        self.func = func
+        self.delay = float(delay)
+        self.jitter = float(jitter)
+        self.active = True
+        self.entry = None
+
+    def get_jitter(self):
+        """
+        Returns a random time between zero and the maximum jitter.
+        """
+        if self.jitter:
+            return random.uniform(0., self.jitter)
+        return 0.
+
+    def get_delay(self):
+        """
+        Returns the delay until the next call, including the random jitter.
+        """
+        return self.delay + self.get_jitter()
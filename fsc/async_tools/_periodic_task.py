@@ -2,10 +2,18 @@
 Defines an asynchronous context manager for running periodic tasks.
 """
 
+import math
+import time
 import asyncio
+import inspect
+from functools import partial
 
 from fsc.export import export
 
+from ._wrap_to_coroutine import wrap_to_coroutine
+
+_OVERRUN_POLICIES = ('skip', 'catch_up', 'coalesce')
+
 
 @export
 class PeriodicTask:
@@ -16,21 +24,86 @@ class PeriodicTask:
     loop : EventLoop
         The event loop on which the tasks are executed. Uses :func:`asyncio.get_event_loop()` if no event loop is specified.
     task_func : Callable
-        The function which is executed. It cannot take any arguments, and must not be a coroutine.
+        The function or coroutine which is executed. It cannot take any arguments.
     delay : float
-        The minimum time between running two calls to the function.
+        The minimum time between running two calls to the function. In
+        fixed-rate mode, this is the period between the start of two calls.
     run_on_exit : bool
         Determines if the function should be run again when exiting the context manager.
+    fixed_rate : bool
+        If set, the function is run at a fixed rate, with each deadline
+        computed from the previous one. Otherwise, the function is run with
+        a fixed ``delay`` between the end of one call and the start of the next.
+    align : bool
+        In fixed-rate mode, determines if the deadlines are aligned to
+        multiples of ``delay`` in wall-clock time. Otherwise, the first call
+        is made immediately.
+    overrun : str
+        Determines what happens in fixed-rate mode when one or more deadlines
+        were missed. With ``'skip'``, the missed deadlines are dropped. With
+        ``'catch_up'``, the function is run once for each missed deadline.
+        With ``'coalesce'``, the function is run once for all the missed
+        deadlines.
+    run_in_executor : bool
+        Determines if the function is run in an executor instead of directly
+        on the event loop. Can only be used if ``task_func`` is not a
+        coroutine.
+    executor : concurrent.futures.Executor
+        The executor in which the function is run if ``run_in_executor`` is
+        set. Uses the default executor of the event loop if not specified.
+    allow_overlap : bool
+        Determines if a call can start before the previous one has finished.
+        Otherwise, the next call is scheduled only after the previous one
+        has finished.
     """
 
-    def __init__(self, task_func, *, loop=None, delay=1., run_on_exit=True):
+    def __init__(
+        self,
+        task_func,
+        *,
+        loop=None,
+        delay=1.,
+        run_on_exit=True,
+        fixed_rate=False,
+        align=False,
+        overrun='skip',
+        run_in_executor=False,
+        executor=None,
+        allow_overlap=False
+    ):
         if loop is None:
             self._loop = asyncio.get_event_loop()
         else:
             self._loop = loop
-        self._task_func = task_func
+        # Plain functions are called directly, without creating a task.
+        self._call_inline = not (
+            run_in_executor or asyncio.iscoroutinefunction(task_func)
+        )
+        self._raw_task_func = task_func
+        if run_in_executor:
+            if asyncio.iscoroutinefunction(task_func):
+                raise ValueError(
+                    'Coroutine functions cannot be run in an executor.'
+                )
+            task_func = partial(
+                self._loop.run_in_executor, executor, task_func
+            )
+        self._task_func = wrap_to_coroutine(task_func)
+        self._allow_overlap = allow_overlap
+        self._runs = set()
         self._delay = float(delay)
         self._run_on_exit = run_on_exit
+        if fixed_rate and self._delay <= 0:
+            raise ValueError('delay must be positive in fixed-rate mode')
+        self._fixed_rate = fixed_rate
+        self._align = align
+        if overrun not in _OVERRUN_POLICIES:
+            raise ValueError(
+                "Invalid overrun policy '{}', must be one of {}.".format(
+                    overrun, _OVERRUN_POLICIES
+                )
+            )
+        self._overrun = overrun
         self._task_loop_started = False
 
     async def __aenter__(self):
@@ -40,9 +113,12 @@ class PeriodicTask:
         while not self._task_loop_started:  # Make sure the periodic task was started
             await asyncio.sleep(0.)
         self._periodic_task.cancel()
-        await self._periodic_task
-        del self._periodic_task
-        self._task_loop_started = False
+        try:
+            await self._periodic_task
+        finally:
+            del self._periodic_task
+            self._runs.clear()
+            self._task_loop_started = False
 
     async def _task_loop(self):
         """
@@ -50,9 +126,64 @@ class PeriodicTask:
         """
         self._task_loop_started = True
         try:
-            while True:
-                self._task_func()
-                await asyncio.sleep(self._delay)
+            if self._fixed_rate:
+                await self._fixed_rate_loop()
+            else:
+                while True:
+                    await self._run()
+                    await asyncio.sleep(self._delay)
         except asyncio.CancelledError:
+            while self._runs:
+                await self._runs.pop()
             if self._run_on_exit:
-                self._task_func()
+                await self._task_func()
+
+    async def _run(self):
+        """
+        Starts a call to the task function, and waits for it to finish unless
+        overlapping calls are allowed.
+        """
+        for run in [run for run in self._runs if run.done()]:
+            self._runs.remove(run)
+            run.result()
+        if self._call_inline:
+            res = self._raw_task_func()
+            if not inspect.isawaitable(res):
+                return
+            run = asyncio.ensure_future(res, loop=self._loop)
+        else:
+            run = self._loop.create_task(self._task_func())
+        self._runs.add(run)
+        if not self._allow_overlap:
+            # The call is shielded, such that it can finish when the
+            # periodic task is cancelled.
+            try:
+                await asyncio.shield(run)
+            finally:
+                if run.done():
+                    self._runs.discard(run)
+
+    async def _fixed_rate_loop(self):
+        """
+        Runs the periodic task at a fixed rate.
+        """
+        deadline = self._loop.time()
+        if self._align:
+            deadline += -time.time() % self._delay
+        while True:
+            await asyncio.sleep(max(deadline - self._loop.time(), 0.))
+            await self._run()
+            deadline = self._next_deadline(deadline)
+
+    def _next_deadline(self, deadline):
+        """
+        Computes the deadline following the given one, applying the overrun
+        policy if one or more deadlines have already passed.
+        """
+        now = self._loop.time()
+        if deadline + self._delay >= now or self._overrun == 'catch_up':
+            return deadline + self._delay
+        num_missed = math.floor((now - deadline) / self._delay)
+        if self._overrun == 'coalesce':
+            return deadline + num_missed * self._delay
+        return deadline + (num_missed + 1) * self._delay
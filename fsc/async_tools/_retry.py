@@ -0,0 +1,172 @@
+"""
+Defines a decorator for retrying failed calls to a function or coroutine,
+with exponential backoff.
+"""
+
+import random
+import asyncio
+from functools import wraps
+
+from fsc.export import export
+
+from ._wrap_to_coroutine import wrap_to_coroutine
+
+
+@export
+class RetryBudget:
+    """
+    Limits the number of retries to a fraction of the calls, such that
+    retries cannot multiply the load when a dependency is failing.
+
+    Each call adds ``ratio`` tokens to the budget, up to ``max_tokens``, and
+    each retry takes one token.
+
+    Arguments
+    ---------
+    ratio : float
+        The maximum number of retries per call, on average.
+    max_tokens : float
+        The maximum number of tokens which can be saved up. This is also the
+        initial number of tokens.
+    """
+
+    def __init__(self, ratio=0.1, *, max_tokens=10.):
+        if ratio < 0:
+            raise ValueError('ratio must be non-negative')
+        self._ratio = ratio
+        self._max_tokens = float(max_tokens)
+        self._tokens = self._max_tokens
+
+    def deposit(self):
+        """
+        Records a call, which adds tokens to the budget.
+        """
+        self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def withdraw(self):
+        """
+        Takes a token from the budget if one is available. Returns ``True``
+        if the retry is allowed.
+        """
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+@export
+class RetryPolicy:
+    """
+    Determines which failed calls are retried, and how long to wait before
+    retrying.
+
+    The delay before the ``n``-th retry is chosen at random between zero and
+    ``base_delay * 2 ** (n - 1)``, capped at ``max_delay``. The random jitter
+    prevents the retries of many callers from being synchronized.
+
+    Arguments
+    ---------
+    max_attempts : int
+        The maximum number of attempts, including the first call.
+    base_delay : float
+        The maximum delay before the first retry.
+    max_delay : float
+        Upper bound for the delay between two attempts.
+    retry_on : type or tuple or dict
+        The exception types which are retried. If a dict is given, it maps
+        exception types to the maximum number of attempts for that type. The
+        first matching type is used.
+    budget : RetryBudget
+        If given, retries are only made while the budget allows it.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_attempts=3,
+        base_delay=0.1,
+        max_delay=10.,
+        retry_on=Exception,
+        budget=None
+    ):
+        if isinstance(retry_on, dict):
+            self._retry_on = list(retry_on.items())
+        else:
+            self._retry_on = [(retry_on, max_attempts)]
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._budget = budget
+
+    def record_call(self):
+        """
+        Records a new call (not a retry) for the retry budget.
+        """
+        if self._budget is not None:
+            self._budget.deposit()
+
+    def should_retry(self, exc, num_attempts):
+        """
+        Determines if a call which raised the given exception should be
+        retried, after the given number of attempts.
+        """
+        if isinstance(exc, asyncio.CancelledError):
+            return False
+        for exc_type, max_attempts in self._retry_on:
+            if isinstance(exc, exc_type):
+                break
+        else:
+            return False
+        if num_attempts >= max_attempts:
+            return False
+        return self._budget is None or self._budget.withdraw()
+
+    def get_delay(self, num_attempts):
+        """
+        Returns the delay before the next attempt, after the given number of
+        attempts.
+        """
+        return random.uniform(
+            0., min(self._max_delay, self._base_delay * 2**(num_attempts - 1))
+        )
+
+
+@export
+def retry(policy=None, **kwargs):
+    """
+    Decorator that retries a function or coroutine when it raises an
+    exception. Cancelling the call also cancels any further retries.
+
+    Arguments
+    ---------
+    policy : RetryPolicy
+        The policy which determines when and how calls are retried. If not
+        given, a policy is created from the keyword arguments.
+    kwargs :
+        Keyword arguments passed to :class:`.RetryPolicy`.
+    """
+    if policy is None:
+        policy = RetryPolicy(**kwargs)
+    elif kwargs:
+        raise ValueError(
+            'Cannot pass both a policy and keyword arguments to retry.'
+        )
+
+    def decorator(func):  # pylint: disable=missing-docstring
+        func_wrapped = wrap_to_coroutine(func)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):  # pylint: disable=missing-docstring
+            policy.record_call()
+            num_attempts = 1
+            while True:
+                try:
+                    return await func_wrapped(*args, **kwargs)
+                except Exception as exc:  # pylint: disable=broad-except
+                    if not policy.should_retry(exc, num_attempts):
+                        raise
+                await asyncio.sleep(policy.get_delay(num_attempts))
+                num_attempts += 1
+
+        return inner
+
+    return decorator
@@ -0,0 +1,201 @@
+"""
+Defines an event loop running on a virtual clock, and a harness for
+simulating the load on asynchronous functions with it.
+"""
+
+import random
+import asyncio
+import selectors
+
+from fsc.export import export
+
+from ._stats import percentile
+
+
+class _VirtualSelector(selectors.BaseSelector):
+    """
+    Selector which never reports any I/O, and instead advances the virtual
+    time by the timeout it is called with.
+    """
+
+    def __init__(self, time_per_iteration):
+        self.time = 0.
+        self._time_per_iteration = time_per_iteration
+        self._map = {}
+
+    def register(self, fileobj, events, data=None):
+        fileno = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        key = selectors.SelectorKey(fileobj, fileno, events, data)
+        self._map[fileobj] = key
+        return key
+
+    def unregister(self, fileobj):
+        return self._map.pop(fileobj)
+
+    def select(self, timeout=None):
+        if timeout is None:
+            raise RuntimeError(
+                'The event loop is waiting without any scheduled callback, '
+                'which can never finish in virtual time.'
+            )
+        self.time += max(timeout, self._time_per_iteration)
+        return []
+
+    def close(self):
+        self._map.clear()
+
+    def get_map(self):
+        return self._map
+
+
+@export
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop whose clock only advances when it has nothing else to do, by
+    jumping straight to the next scheduled callback. Code which sleeps or
+    uses timeouts therefore runs as fast as the CPU allows, independent of
+    the durations involved.
+
+    The virtual time starts at zero. I/O and executors are not supported.
+
+    Arguments
+    ---------
+    time_per_iteration : float
+        The virtual time which passes in each iteration of the event loop,
+        even if callbacks are ready to run. This guarantees that code which
+        polls with ``asyncio.sleep(0)`` cannot stall the clock.
+    """
+
+    def __init__(self, *, time_per_iteration=1e-6):
+        self._virtual_selector = _VirtualSelector(time_per_iteration)
+        super().__init__(selector=self._virtual_selector)
+
+    def time(self):
+        return self._virtual_selector.time
+
+
+@export
+class SimulationResult:
+    """
+    Result of a :func:`.simulate_load` run.
+
+    Attributes
+    ----------
+    num_calls : int
+        The number of calls which were made.
+    num_failed : int
+        The number of calls which raised an exception.
+    duration : float
+        The virtual time until the last call had finished.
+    latencies : list(float)
+        The sorted latencies of the successful calls.
+    """
+
+    def __init__(self, *, num_calls, num_failed, duration, latencies):
+        self.num_calls = num_calls
+        self.num_failed = num_failed
+        self.duration = duration
+        self.latencies = sorted(latencies)
+
+    @property
+    def throughput(self):
+        """
+        The number of successful calls per unit of (virtual) time.
+        """
+        return len(self.latencies) / self.duration
+
+    def percentile(self, percent):
+        """
+        Returns the ``percent``-th percentile of the latency of successful
+        calls.
+        """
+        return percentile(self.latencies, percent)
+
+    def __repr__(self):
+        return (
+            '{}(num_calls={}, num_failed={}, duration={:.3f}, '
+            'throughput={:.3f}, p50={:.3g}, p99={:.3g})'
+        ).format(
+            type(self).__name__, self.num_calls, self.num_failed,
+            self.duration, self.throughput, self.percentile(50),
+            self.percentile(99)
+        )
+
+
+@export
+def simulate_load(
+    make_target, *, arrival_rate, duration, seed=None, time_per_iteration=1e-6
+):
+    """
+    Simulates calls arriving at random times at a coroutine function, and
+    measures their latency. The simulation runs on a
+    :class:`.VirtualTimeEventLoop`, such that long durations can be simulated
+    in a short time.
+
+    The simulated backend should use ``asyncio.sleep`` to model its latency.
+    A :class:`.BatchSubmitter` should be given a non-zero ``sleep_time``,
+    since polling with zero sleep time only advances the virtual clock by
+    ``time_per_iteration``.
+
+    Arguments
+    ---------
+    make_target : Callable
+        Function which is called with a :class:`random.Random` instance on
+        the simulation event loop, and returns the coroutine function which
+        is tested. The coroutine function is called with the index of the
+        call.
+    arrival_rate : float
+        The average number of calls per unit of time. The calls arrive as a
+        Poisson process.
+    duration : float
+        The (virtual) time during which new calls arrive.
+    seed : int
+        Seed for the random number generator.
+    time_per_iteration : float
+        Passed to the :class:`.VirtualTimeEventLoop`.
+
+    Returns
+    -------
+    SimulationResult
+    """
+    rng = random.Random(seed)
+    loop = VirtualTimeEventLoop(time_per_iteration=time_per_iteration)
+    latencies = []
+    num_failed = 0
+
+    async def call(target, idx):  # pylint: disable=missing-docstring
+        nonlocal num_failed
+        start = loop.time()
+        try:
+            await target(idx)
+        except Exception:  # pylint: disable=broad-except
+            num_failed += 1
+        else:
+            latencies.append(loop.time() - start)
+
+    async def run():  # pylint: disable=missing-docstring
+        target = make_target(rng)
+        pending = set()
+        num_calls = 0
+        arrival_time = rng.expovariate(arrival_rate)
+        while arrival_time < duration:
+            await asyncio.sleep(arrival_time - loop.time())
+            task = loop.create_task(call(target, num_calls))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            num_calls += 1
+            arrival_time += rng.expovariate(arrival_rate)
+        if pending:
+            await asyncio.wait(pending)
+        return num_calls
+
+    try:
+        num_calls = loop.run_until_complete(run())
+    finally:
+        loop.close()
+    return SimulationResult(
+        num_calls=num_calls,
+        num_failed=num_failed,
+        duration=loop.time(),
+        latencies=latencies
+    )
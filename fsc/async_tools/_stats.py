@@ -0,0 +1,55 @@
+"""
+Defines helpers for keeping statistics of latencies.
+"""
+
+import math
+from collections import deque
+
+
+def percentile(sorted_values, percent):
+    """
+    Returns the ``percent``-th percentile (with ``0 <= percent <= 100``) of
+    the given sorted values, using the nearest-rank method.
+    """
+    if not sorted_values:
+        raise ValueError('Cannot compute the percentile of an empty sequence.')
+    idx = max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[idx]
+
+
+class SlidingWindow:
+    """
+    Keeps the most recent values, and computes their percentiles. The
+    sorted values are cached, and only updated after a tenth of the
+    window has been replaced.
+
+    Arguments
+    ---------
+    size : int
+        The maximum number of values which are kept.
+    """
+
+    def __init__(self, size):
+        self._values = deque(maxlen=size)
+        self._sorted = []
+        self._num_outdated = 0
+        self._max_outdated = max(size // 10, 1)
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, value):
+        """
+        Adds a value, dropping the oldest one if the window is full.
+        """
+        self._values.append(value)
+        self._num_outdated += 1
+
+    def percentile(self, percent):
+        """
+        Returns the ``percent``-th percentile of the values in the window.
+        """
+        if self._num_outdated >= self._max_outdated or not self._sorted:
+            self._sorted = sorted(self._values)
+            self._num_outdated = 0
+        return percentile(self._sorted, percent)
@@ -2,26 +2,40 @@
 Defines a decorator for wrapping functions and coroutines into a coroutine.
 """
 
+import inspect
 from functools import wraps
 from collections.abc import Awaitable
 
 from fsc.export import export
 
+# Result types which are known not to be awaitable. Checking the type
+# against this (fixed) set is cheaper than the Awaitable ABC check.
+_PLAIN_TYPES = frozenset([
+    type(None), bool, int, float, complex, str, bytes, tuple, list, dict, set,
+    frozenset
+])
+
 
 @export
 def wrap_to_coroutine(func):
     """
-    Wraps a function or coroutine into a coroutine.
+    Wraps a function or coroutine into a coroutine. Coroutine functions are
+    returned unchanged. For other functions, results of common builtin types
+    are returned without checking whether they are awaitable.
 
     Arguments
     ---------
     func: Callable
         The function or coroutine that should be wrapped.
     """
+    if inspect.iscoroutinefunction(func):
+        return func
 
     @wraps(func)
     async def inner(*args, **kwargs):  # pylint: disable=missing-docstring
         res = func(*args, **kwargs)
+        if type(res) in _PLAIN_TYPES:  # pylint: disable=unidiomatic-typecheck
+            return res
         if isinstance(res, Awaitable):
             return await res
         return res
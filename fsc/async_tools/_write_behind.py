@@ -0,0 +1,175 @@
+"""
+Defines a buffer which collects inputs without waiting for results, and
+submits them in batches to a 'listable' function.
+"""
+
+import asyncio
+from collections import deque
+
+from fsc.export import export
+
+from ._periodic_task import PeriodicTask
+from ._wrap_to_coroutine import wrap_to_coroutine
+
+_OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'raise')
+
+
+@export
+class WriteBehindBuffer:
+    """
+    Asynchronous context manager that collects inputs, and submits them in
+    batches to a function which can take a list of parameters. Unlike the
+    :class:`.BatchSubmitter`, the results are discarded, and adding an input
+    does not wait for it to be submitted.
+
+    A batch is submitted when ``max_batch_size`` inputs are waiting, and
+    otherwise every ``flush_interval``. When exiting the context manager,
+    all remaining inputs are submitted, and the running batches are waited
+    for.
+
+    Arguments
+    ---------
+    func: Callable
+        Function or coroutine which is "listable", i.e. it takes a list of
+        input parameters.
+    loop: EventLoop
+        The event loop on which the buffer runs. Uses
+        ``asyncio.get_event_loop()`` by default.
+    max_batch_size : int
+        The maximum size of a batch that will be submitted.
+    flush_interval : float
+        The time between submitting the waiting inputs, even if there are
+        fewer than ``max_batch_size``.
+    max_size : int
+        The maximum number of inputs which are waiting to be submitted.
+    overflow : str
+        Determines what happens when an input is added while ``max_size``
+        inputs are waiting. With ``'drop_oldest'``, the oldest waiting input
+        is dropped. With ``'drop_newest'``, the new input is dropped. With
+        ``'raise'``, an :class:`asyncio.QueueFull` exception is raised.
+    max_num_parallel : int
+        The maximum number of batches which are submitted in parallel.
+    on_error : Callable
+        Function which is called with the exception and the list of inputs
+        when a batch fails. By default, the exception is passed to the
+        exception handler of the event loop.
+    """
+
+    def __init__(
+        self,
+        func,
+        *,
+        loop=None,
+        max_batch_size=1000,
+        flush_interval=1.,
+        max_size=100000,
+        overflow='drop_oldest',
+        max_num_parallel=1,
+        on_error=None
+    ):
+        self._func = wrap_to_coroutine(func)
+        self._loop = loop or asyncio.get_event_loop()
+        if max_batch_size <= 0:
+            raise ValueError('max_batch_size must be positive')
+        self._max_batch_size = max_batch_size
+        if max_size < max_batch_size:
+            raise ValueError('max_size must be at least max_batch_size')
+        self._max_size = max_size
+        if overflow not in _OVERFLOW_POLICIES:
+            raise ValueError(
+                "Invalid overflow policy '{}', must be one of {}.".format(
+                    overflow, _OVERFLOW_POLICIES
+                )
+            )
+        self._overflow = overflow
+        if max_num_parallel <= 0:
+            raise ValueError('max_num_parallel must be positive')
+        self._max_num_parallel = max_num_parallel
+        self._on_error = on_error
+        self._periodic_flush = PeriodicTask(
+            self._flush,
+            loop=self._loop,
+            delay=flush_interval,
+            run_on_exit=False
+        )
+
+        self._buffer = deque()
+        self._batches = set()
+        self._running = False
+        self.num_dropped = 0
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def add(self, x):
+        """
+        Adds an input, which is submitted in a later batch.
+        """
+        if len(self._buffer) >= self._max_size:
+            if self._overflow == 'raise':
+                raise asyncio.QueueFull
+            self.num_dropped += 1
+            if self._overflow == 'drop_newest':
+                return
+            self._buffer.popleft()
+        self._buffer.append(x)
+        if self._running and len(self._buffer) >= self._max_batch_size:
+            self._launch_batches(full_only=True)
+
+    async def __aenter__(self):
+        self._running = True
+        await self._periodic_flush.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):  # pylint: disable=missing-docstring
+        await self._periodic_flush.__aexit__(exc_type, exc_value, traceback)
+        self._running = False
+        while self._buffer or self._batches:
+            self._launch_batches(full_only=False)
+            await asyncio.wait(
+                list(self._batches), return_when=asyncio.FIRST_COMPLETED
+            )
+
+    def _flush(self):
+        """
+        Submits the waiting inputs, even if they do not fill a batch.
+        """
+        self._launch_batches(full_only=False)
+
+    def _launch_batches(self, *, full_only):
+        """
+        Launches batches while the number of parallel batches allows it.
+        """
+        while len(self._batches) < self._max_num_parallel and self._buffer:
+            if full_only and len(self._buffer) < self._max_batch_size:
+                return
+            batch = [
+                self._buffer.popleft()
+                for _ in range(min(self._max_batch_size, len(self._buffer)))
+            ]
+            task = self._loop.create_task(self._func(batch))
+            task.add_done_callback(
+                lambda task, batch=batch: self._process_finished_batch(
+                    task, batch
+                )
+            )
+            self._batches.add(task)
+
+    def _process_finished_batch(self, task, batch):
+        """
+        Reports errors of a finished batch, and launches the next batch if
+        enough inputs are waiting.
+        """
+        self._batches.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            if self._on_error is None:
+                self._loop.call_exception_handler(
+                    dict(
+                        message='Write-behind batch failed.',
+                        exception=task.exception()
+                    )
+                )
+            else:
+                self._on_error(task.exception(), batch)
+        if self._running:
+            self._launch_batches(full_only=True)
@@ -19,8 +19,8 @@ except IOError:
 with open('version.txt', 'r') as f:
     version = f.read().strip()
 
-if sys.version_info < (3, 5):
-    raise "Must use at least Python version 3.5"
+if sys.version_info < (3, 7):
+    raise "Must use at least Python version 3.7"
 
 setup(
     name=pkgname_qualified.replace('_', '-'),
@@ -44,9 +44,8 @@ setup(
     classifiers=[
         'License :: OSI Approved :: Apache Software License',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
         'Topic :: Utilities',
     ],
     license='Apache',
@@ -1,3 +1,19 @@
 """
 Configuration file for pytest tests.
 """
+
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+def run_future():
+    """
+    Fixture to run a future in the event loop.
+    """
+
+    def inner(fut):  # pylint: disable=missing-docstring
+        return asyncio.get_event_loop().run_until_complete(fut)
+
+    return inner
@@ -0,0 +1,155 @@
+"""
+Tests for the ``amap`` asynchronous map.
+"""
+
+import random
+import asyncio
+
+import pytest
+
+from fsc.async_tools import amap
+
+
+def collect(async_iterator):
+    """
+    Collects the results of an asynchronous iterator into a list.
+    """
+
+    async def inner():  # pylint: disable=missing-docstring
+        return [x async for x in async_iterator]
+
+    return asyncio.get_event_loop().run_until_complete(inner())
+
+
+@pytest.fixture
+def count_coro():
+    """
+    Returns a coroutine function that returns its input after a random
+    delay, and records the maximum number of parallel calls.
+    """
+    count = 0
+
+    async def inner(x):  # pylint: disable=missing-docstring
+        nonlocal count
+        count += 1
+        inner.max_count = max(inner.max_count, count)
+        await asyncio.sleep(random.uniform(0, 0.002))
+        count -= 1
+        return x
+
+    inner.max_count = 0
+    return inner
+
+
+async def async_range(num):
+    for i in range(num):
+        await asyncio.sleep(0.)
+        yield i
+
+
+@pytest.mark.parametrize('max_num_parallel', [1, 5, 20])
+@pytest.mark.parametrize('use_async_iterable', [True, False])
+def test_ordered(count_coro, max_num_parallel, use_async_iterable):  # pylint: disable=redefined-outer-name
+    """
+    Test that the results are in input order, and the number of parallel
+    calls does not exceed the maximum.
+    """
+    inputs = async_range(100) if use_async_iterable else range(100)
+    res = collect(amap(count_coro, inputs, max_num_parallel=max_num_parallel))
+    assert res == list(range(100))
+    assert max_num_parallel // 2 <= count_coro.max_count <= max_num_parallel
+
+
+@pytest.mark.parametrize('max_num_parallel', [1, 5, 20])
+def test_unordered(count_coro, max_num_parallel):  # pylint: disable=redefined-outer-name
+    """
+    Test that all results are yielded in unordered mode.
+    """
+    res = collect(
+        amap(
+            count_coro,
+            range(100),
+            max_num_parallel=max_num_parallel,
+            ordered=False
+        )
+    )
+    assert sorted(res) == list(range(100))
+    assert max_num_parallel // 2 <= count_coro.max_count <= max_num_parallel
+
+
+def test_lazy_input():
+    """
+    Test that inputs are only consumed as calls finish.
+    """
+    consumed = []
+
+    def inputs():
+        for i in range(1000):
+            consumed.append(i)
+            yield i
+
+    async def run():  # pylint: disable=missing-docstring
+        async for x in amap(lambda x: x, inputs(), max_num_parallel=3):
+            if x == 10:
+                break
+        return len(consumed)
+
+    assert asyncio.get_event_loop().run_until_complete(run()) <= 14
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_exception(ordered):
+    """
+    Test that exceptions in the calls are raised.
+    """
+
+    async def less_than_ten(x):
+        await asyncio.sleep(0.)
+        if x < 10:
+            return x
+        raise ValueError('Value must be less than ten.')
+
+    with pytest.raises(ValueError):
+        collect(
+            amap(
+                less_than_ten, range(20), max_num_parallel=3, ordered=ordered
+            )
+        )
+
+
+@pytest.mark.parametrize('fail', [True, False])
+def test_close_source(fail):
+    """
+    Test that the source iterator is closed when the consumer stops early,
+    or when a call raises.
+    """
+    closed = False
+
+    async def inputs():
+        nonlocal closed
+        try:
+            for i in range(1000):
+                yield i
+        finally:
+            closed = True
+
+    def check(x):  # pylint: disable=missing-docstring
+        if fail and x == 5:
+            raise ValueError
+        return x
+
+    async def run():  # pylint: disable=missing-docstring
+        results = amap(check, inputs(), max_num_parallel=3)
+        try:
+            async for x in results:
+                if x == 10:
+                    break
+        finally:
+            await results.aclose()
+
+    if fail:
+        with pytest.raises(ValueError):
+            asyncio.get_event_loop().run_until_complete(run())
+    else:
+        asyncio.get_event_loop().run_until_complete(run())
+    assert closed
@@ -0,0 +1,184 @@
+"""
+Tests for the BatchPipeline.
+"""
+
+import asyncio
+
+import pytest
+
+from fsc.async_tools import BatchPipeline, BatchStage
+
+
+def make_stage_func(offset, batch_sizes):
+    """
+    Returns a listable coroutine which adds an offset to its inputs, and
+    records the batch sizes.
+    """
+
+    async def inner(inputs):  # pylint: disable=missing-docstring
+        batch_sizes.append(len(inputs))
+        await asyncio.sleep(0.)
+        return [x + offset for x in inputs]
+
+    return inner
+
+
+async def call_pipeline(pipeline, inputs):
+    """
+    Runs the inputs through the pipeline.
+    """
+    async with pipeline:
+        return await asyncio.gather(*[pipeline(x) for x in inputs])
+
+
+def test_pipeline(run_future):
+    """
+    Test that the inputs pass through all stages, with different batch
+    sizes in each stage.
+    """
+    sizes_a = []
+    sizes_b = []
+    pipeline = BatchPipeline([
+        BatchStage(make_stage_func(1, sizes_a), max_batch_size=10, timeout=0.),
+        BatchStage(make_stage_func(10, sizes_b), max_batch_size=50),
+    ])
+    res = run_future(call_pipeline(pipeline, range(100)))
+    assert res == [x + 11 for x in range(100)]
+    assert max(sizes_a) == 10
+    assert sizes_b == [50, 50]
+
+
+@pytest.mark.parametrize('max_num_parallel', [1, 3])
+def test_concurrency(max_num_parallel, run_future):
+    """
+    Test that the number of parallel batches of a stage is limited.
+    """
+    count = 0
+    max_count = 0
+
+    async def func(inputs):  # pylint: disable=missing-docstring
+        nonlocal count, max_count
+        count += 1
+        max_count = max(max_count, count)
+        await asyncio.sleep(0.01)
+        count -= 1
+        return inputs
+
+    pipeline = BatchPipeline([
+        BatchStage(
+            func,
+            max_batch_size=5,
+            timeout=0.,
+            max_num_parallel=max_num_parallel
+        )
+    ])
+    assert run_future(call_pipeline(pipeline, range(50))) == list(range(50))
+    assert max_count == max_num_parallel
+
+
+@pytest.mark.parametrize('interval', [None, 0.001])
+def test_parallel_batch_size(interval, run_future):
+    """
+    Test that running batches in parallel does not split up the inputs
+    into smaller batches.
+    """
+    batch_sizes = []
+    pipeline = BatchPipeline([
+        BatchStage(
+            make_stage_func(0, batch_sizes),
+            max_num_parallel=4,
+            timeout=0.2,
+            max_batch_size=100
+        )
+    ])
+
+    async def run():  # pylint: disable=missing-docstring
+        async with pipeline:
+            tasks = []
+            for x in range(40):
+                tasks.append(asyncio.ensure_future(pipeline(x)))
+                if interval is not None:
+                    await asyncio.sleep(interval)
+            return await asyncio.gather(*tasks)
+
+    assert run_future(run()) == list(range(40))
+    assert batch_sizes == [40]
+
+
+def test_backpressure(run_future):
+    """
+    Test that the buffer size limits the number of inputs waiting in front
+    of a slow stage.
+    """
+    num_started = 0
+
+    def count(inputs):  # pylint: disable=missing-docstring
+        nonlocal num_started
+        num_started += len(inputs)
+        return inputs
+
+    async def slow(inputs):  # pylint: disable=missing-docstring
+        await asyncio.sleep(0.01)
+        return inputs
+
+    pipeline = BatchPipeline([
+        BatchStage(count, max_batch_size=5, timeout=0.),
+        BatchStage(slow, max_batch_size=5, timeout=0.),
+    ],
+                             buffer_size=10)
+
+    async def run():  # pylint: disable=missing-docstring
+        async with pipeline:
+            tasks = [asyncio.ensure_future(pipeline(x)) for x in range(100)]
+            await asyncio.sleep(0.005)
+            # The slow stage holds one batch, and the buffer in front of it
+            # is full. The first stage blocks with at most one batch.
+            assert num_started <= 5 + 10 + 5
+            return await asyncio.gather(*tasks)
+
+    assert run_future(run()) == list(range(100))
+
+
+def test_exception(run_future):
+    """
+    Test that exceptions are raised for the inputs of the failed batch.
+    """
+
+    def func(inputs):  # pylint: disable=missing-docstring
+        if 3 in inputs:
+            raise ValueError
+        return inputs
+
+    pipeline = BatchPipeline([
+        BatchStage(lambda x: x, max_batch_size=2, timeout=0.),
+        BatchStage(func, max_batch_size=2, timeout=0.),
+    ])
+
+    async def run():  # pylint: disable=missing-docstring
+        async with pipeline:
+            return await asyncio.gather(
+                *[pipeline(x) for x in range(6)], return_exceptions=True
+            )
+
+    res = run_future(run())
+    assert res[:2] + res[4:] == [0, 1, 4, 5]
+    assert all(isinstance(r, ValueError) for r in res[2:4])
+
+
+def test_not_entered(run_future):
+    """
+    Test that calling a pipeline which was not entered raises an error.
+    """
+    pipeline = BatchPipeline([BatchStage(lambda x: x)])
+    with pytest.raises(RuntimeError):
+        run_future(pipeline(1))
+
+
+def test_invalid_stage():
+    """
+    Test that invalid batch sizes raise an error.
+    """
+    with pytest.raises(ValueError):
+        BatchStage(lambda x: x, max_batch_size=0)
+    with pytest.raises(TypeError):
+        BatchStage(lambda x: x, invalid=1)
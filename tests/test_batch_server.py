@@ -0,0 +1,122 @@
+"""
+Tests for the BatchServer and BatchClient.
+"""
+
+# pylint: disable=redefined-outer-name
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+import fsc.async_tools
+from fsc.async_tools import BatchServer, BatchClient
+
+ROOT_DIR = os.path.dirname(
+    os.path.dirname(
+        os.path.dirname(os.path.abspath(fsc.async_tools.__file__))
+    )
+)
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / 'batch.sock')
+
+
+def test_clients(socket_path, run_future):
+    """
+    Test that the inputs from several clients are combined into batches,
+    and the results are returned to the right client.
+    """
+    batches = []
+
+    def func(inputs):  # pylint: disable=missing-docstring
+        batches.append(inputs)
+        return [x * 3 for x in inputs]
+
+    async def run():  # pylint: disable=missing-docstring
+        async with BatchServer(func, socket_path, timeout=0.05):
+            async with BatchClient(socket_path) as client_a, BatchClient(
+                socket_path
+            ) as client_b:
+                return await asyncio.gather(
+                    *[client_a(i) for i in range(50)],
+                    *[client_b(-i) for i in range(50)]
+                )
+
+    res = run_future(run())
+    assert res == [3 * i for i in range(50)] + [-3 * i for i in range(50)]
+    assert len(batches) == 1
+    expected_batch = list(range(50)) + [-i for i in range(50)]
+    assert sorted(batches[0]) == sorted(expected_batch)
+
+
+def test_exception(socket_path, run_future):
+    """
+    Test that exceptions are sent back to the client.
+    """
+
+    def func(inputs):  # pylint: disable=missing-docstring
+        raise ValueError('invalid inputs {}'.format(inputs))
+
+    async def run():  # pylint: disable=missing-docstring
+        async with BatchServer(func, socket_path, timeout=0.):
+            async with BatchClient(socket_path) as client:
+                with pytest.raises(ValueError):
+                    await client(1)
+
+    run_future(run())
+
+
+def test_server_closed(socket_path, run_future, caplog):
+    """
+    Test that pending calls fail when the server is closed, and that the
+    server exits cleanly.
+    """
+
+    async def func(inputs):  # pylint: disable=missing-docstring
+        await asyncio.sleep(10.)
+        return inputs
+
+    async def run():  # pylint: disable=missing-docstring
+        client = BatchClient(socket_path)
+        async with BatchServer(func, socket_path, timeout=0.):
+            task = asyncio.ensure_future(client(1))
+            await asyncio.sleep(0.05)
+        with pytest.raises(ConnectionError):
+            await task
+        await client.close()
+
+    run_future(run())
+    assert not os.path.exists(socket_path)
+    assert not [
+        record for record in caplog.records if record.levelname == 'ERROR'
+    ]
+
+
+def test_subprocess_client(socket_path, run_future):
+    """
+    Test a client running in a different process.
+    """
+    code = '\n'.join([
+        'import sys, asyncio',
+        'from fsc.async_tools import BatchClient',
+        'async def run():',
+        '    async with BatchClient(sys.argv[1]) as client:',
+        '        res = await asyncio.gather(*[client(i) for i in range(10)])',
+        '    assert res == [2 * i for i in range(10)], res',
+        'asyncio.get_event_loop().run_until_complete(run())',
+    ])
+
+    async def run():  # pylint: disable=missing-docstring
+        async with BatchServer(
+            lambda inputs: [2 * x for x in inputs], socket_path, timeout=0.
+        ):
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, '-c', code, socket_path, cwd=ROOT_DIR
+            )
+            return await proc.wait()
+
+    assert run_future(run()) == 0
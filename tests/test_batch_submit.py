@@ -105,3 +105,109 @@ def test_recursive_calls_timeout():
     func = BatchSubmitter(recursive_coro_troll, timeout=0.1, max_batch_size=2)
     res = loop.run_until_complete(asyncio.gather(func(3), func(6)))
     assert res == [-3, 0]
+
+
+class Replica:
+    """
+    Listable coroutine which records the batches it is called with, and the
+    maximum number of parallel batches.
+    """
+
+    def __init__(self, delay=0., failing=False):
+        self.delay = delay
+        self.failing = failing
+        self.batches = []
+        self.num_running = 0
+        self.max_running = 0
+
+    async def __call__(self, inputs):
+        self.batches.append(inputs)
+        self.num_running += 1
+        self.max_running = max(self.max_running, self.num_running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.num_running -= 1
+        if self.failing:
+            raise ValueError
+        return inputs
+
+
+def submit_sequential_batches(submitter, num_batches, batch_size):
+    """
+    Submits the given number of batches to the submitter, waiting only
+    until each batch has been launched.
+    """
+
+    async def inner():  # pylint: disable=missing-docstring
+        futures = []
+        for i in range(num_batches):
+            futures.extend(
+                asyncio.ensure_future(submitter(i * batch_size + j))
+                for j in range(batch_size)
+            )
+            await asyncio.sleep(0.005)
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    return asyncio.get_event_loop().run_until_complete(inner())
+
+
+def test_least_outstanding():
+    """
+    Test that batches are spread across the replicas with the fewest running
+    batches.
+    """
+    replicas = [Replica(delay=0.1) for _ in range(3)]
+    submitter = BatchSubmitter(replicas, timeout=0.)
+    res = submit_sequential_batches(submitter, 6, 5)
+    assert res == list(range(30))
+    assert [len(r.batches) for r in replicas] == [2, 2, 2]
+
+
+def test_latency():
+    """
+    Test that batches are preferably submitted to the fastest replica.
+    """
+    fast = Replica(delay=0.)
+    slow = Replica(delay=0.02)
+    submitter = BatchSubmitter([slow, fast], timeout=0., balance='latency')
+    res = submit_sequential_batches(submitter, 10, 5)
+    assert res == list(range(50))
+    assert len(slow.batches) == 1
+    assert len(fast.batches) == 9
+
+
+def test_max_parallel_per_replica():
+    """
+    Test that the number of parallel batches per replica is limited.
+    """
+    replicas = [Replica(delay=0.01) for _ in range(2)]
+    submitter = BatchSubmitter(
+        replicas, timeout=0., max_batch_size=2, max_parallel_per_replica=1
+    )
+    loop = asyncio.get_event_loop()
+    res = loop.run_until_complete(
+        asyncio.gather(*[submitter(i) for i in range(20)])
+    )
+    assert res == list(range(20))
+    assert all(r.max_running == 1 for r in replicas)
+
+
+def test_eject_failing_replica():
+    """
+    Test that a failing replica is no longer used.
+    """
+    failing = Replica(failing=True)
+    working = Replica(delay=0.01)
+    submitter = BatchSubmitter([failing, working], timeout=0., eject_after=2)
+    res = submit_sequential_batches(submitter, 10, 2)
+    assert len(failing.batches) == 2
+    assert sum(isinstance(r, ValueError) for r in res) == 4
+
+
+def test_invalid_balance():
+    """
+    Test that an invalid balance policy raises an error.
+    """
+    with pytest.raises(ValueError):
+        BatchSubmitter(lambda x: x, balance='random')
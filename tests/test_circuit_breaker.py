@@ -0,0 +1,198 @@
+"""
+Tests for the CircuitBreaker decorator.
+"""
+
+import asyncio
+
+import pytest
+
+from fsc.async_tools import (
+    CircuitBreaker, CircuitOpenError, limit_parallel, BatchSubmitter
+)
+
+
+class Backend:
+    """
+    Coroutine which fails while ``failing`` is set, and counts its calls.
+    """
+
+    def __init__(self):
+        self.failing = False
+        self.num_calls = 0
+
+    async def __call__(self, x):
+        self.num_calls += 1
+        await asyncio.sleep(0.)
+        if self.failing:
+            raise ValueError
+        return x
+
+
+async def call_many(func, num_calls):
+    """
+    Calls the function the given number of times, one after the other, and
+    returns the results or exceptions.
+    """
+    res = []
+    for i in range(num_calls):
+        try:
+            res.append(await func(i))
+        except Exception as exc:  # pylint: disable=broad-except
+            res.append(exc)
+    return res
+
+
+def test_open(run_future):
+    """
+    Test that the circuit breaker opens when calls fail, and then rejects
+    calls without calling the function.
+    """
+    backend = Backend()
+    breaker = CircuitBreaker(window_size=10, min_calls=5, reset_timeout=10.)
+    func = breaker(backend)
+    assert run_future(call_many(func, 10)) == list(range(10))
+    assert breaker.state == 'closed'
+    backend.failing = True
+    res = run_future(call_many(func, 20))
+    assert all(isinstance(r, ValueError) for r in res[:6])
+    assert all(isinstance(r, CircuitOpenError) for r in res[6:])
+    assert breaker.state == 'open'
+    assert backend.num_calls == 16
+
+
+@pytest.mark.parametrize('recovered', [True, False])
+def test_half_open(recovered, run_future):
+    """
+    Test that probe calls are let through after the reset timeout, and
+    close or re-open the circuit breaker.
+    """
+    backend = Backend()
+    breaker = CircuitBreaker(
+        window_size=4, min_calls=4, reset_timeout=0.01, half_open_max_calls=2
+    )
+    func = breaker(backend)
+    backend.failing = True
+    run_future(call_many(func, 4))
+    assert breaker.state == 'open'
+    run_future(asyncio.sleep(0.02))
+    assert breaker.state == 'half-open'
+    backend.failing = not recovered
+
+    async def run():  # pylint: disable=missing-docstring
+        return await asyncio.gather(
+            *[func(i) for i in range(4)], return_exceptions=True
+        )
+
+    res = run_future(run())
+    assert all(isinstance(r, CircuitOpenError) for r in res[2:])
+    if recovered:
+        assert res[:2] == [0, 1]
+        assert breaker.state == 'closed'
+    else:
+        assert breaker.state == 'open'
+
+
+def test_ignored_exceptions(run_future):
+    """
+    Test that exceptions which are not in failure_on are not counted.
+    """
+
+    async def raise_key_error(x):  # pylint: disable=unused-argument
+        raise KeyError
+
+    breaker = CircuitBreaker(min_calls=1, failure_on=ValueError)
+    res = run_future(call_many(breaker(raise_key_error), 10))
+    assert all(isinstance(r, KeyError) for r in res)
+    assert breaker.state == 'closed'
+
+
+def test_limit_parallel(run_future):
+    """
+    Test that calls waiting for limit_parallel are rejected without calling
+    the function once the circuit breaker is open.
+    """
+    backend = Backend()
+    backend.failing = True
+    breaker = CircuitBreaker(window_size=4, min_calls=4)
+    func = limit_parallel(1)(breaker(backend))
+
+    async def run():  # pylint: disable=missing-docstring
+        return await asyncio.gather(
+            *[func(i) for i in range(100)], return_exceptions=True
+        )
+
+    res = run_future(run())
+    assert all(isinstance(r, ValueError) for r in res[:4])
+    assert all(isinstance(r, CircuitOpenError) for r in res[4:])
+    assert backend.num_calls == 4
+
+
+def test_limit_parallel_guard(run_future):
+    """
+    Test that guarded calls are rejected without waiting for a slot of
+    limit_parallel while the circuit breaker is open.
+    """
+    breaker = CircuitBreaker(window_size=2, min_calls=2)
+
+    @breaker
+    async def fail():
+        raise ValueError
+
+    @breaker.guard
+    @limit_parallel(1)
+    @breaker
+    async def func(delay):
+        await asyncio.sleep(delay)
+
+    async def run():  # pylint: disable=missing-docstring
+        hung_task = asyncio.ensure_future(func(1.))
+        await asyncio.sleep(0.)
+        await call_many(fail, 2)
+        assert breaker.state == 'open'
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        with pytest.raises(CircuitOpenError):
+            await func(0.)
+        assert loop.time() - start < 0.1
+        hung_task.cancel()
+
+    run_future(run())
+
+
+def test_batch_submitter(run_future):
+    """
+    Test that each batch of a BatchSubmitter counts as a single call, and
+    that an open circuit breaker rejects the inputs.
+    """
+    batch_sizes = []
+
+    def func(inputs):  # pylint: disable=missing-docstring
+        batch_sizes.append(len(inputs))
+        raise ValueError
+
+    breaker = CircuitBreaker(window_size=4, min_calls=2)
+    submitter = BatchSubmitter(
+        func,
+        timeout=0.,
+        max_batch_size=5,
+        max_parallel_per_replica=1,
+        circuit_breaker=breaker
+    )
+
+    async def run():  # pylint: disable=missing-docstring
+        res = await asyncio.gather(
+            *[submitter(i) for i in range(5)], return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in res)
+        assert breaker.state == 'closed'
+        res = await asyncio.gather(
+            *[submitter(i) for i in range(10)], return_exceptions=True
+        )
+        assert all(isinstance(r, ValueError) for r in res[:5])
+        assert all(isinstance(r, CircuitOpenError) for r in res[5:])
+        assert breaker.state == 'open'
+        with pytest.raises(CircuitOpenError):
+            await submitter(0)
+
+    run_future(run())
+    assert batch_sizes == [5, 5]
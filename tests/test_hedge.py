@@ -0,0 +1,130 @@
+"""
+Tests for the ``hedge`` decorator.
+"""
+
+import asyncio
+
+import pytest
+
+from fsc.async_tools import hedge, RetryBudget
+
+
+def make_backend(latencies):
+    """
+    Returns a coroutine function whose calls take the given latencies in
+    turn, and which records how many calls were started and cancelled.
+    """
+    latency_iter = iter(latencies)
+
+    async def inner(x):  # pylint: disable=missing-docstring
+        inner.num_calls += 1
+        try:
+            await asyncio.sleep(next(latency_iter))
+        except asyncio.CancelledError:
+            inner.num_cancelled += 1
+            raise
+        return x
+
+    inner.num_calls = 0
+    inner.num_cancelled = 0
+    return inner
+
+
+def test_fast_call(run_future):
+    """
+    Test that calls which finish before the delay are not hedged.
+    """
+    backend = make_backend([0., 0.])
+    func = hedge(0.05)(backend)
+    assert run_future(func(1)) == 1
+    assert backend.num_calls == 1
+
+
+def test_slow_call(run_future):
+    """
+    Test that a slow call is hedged, and the loser is cancelled.
+    """
+    backend = make_backend([1., 0.])
+    func = hedge(0.01)(backend)
+
+    async def run():  # pylint: disable=missing-docstring
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        assert await func(1) == 1
+        assert loop.time() - start < 0.5
+        await asyncio.sleep(0.)
+
+    run_future(run())
+    assert backend.num_calls == 2
+    assert backend.num_cancelled == 1
+
+
+def test_failing_call(run_future):
+    """
+    Test that the result of the hedge is used if the first call fails.
+    """
+
+    async def backend(x):
+        backend.num_calls += 1
+        if backend.num_calls == 1:
+            await asyncio.sleep(0.02)
+            raise ValueError
+        await asyncio.sleep(0.05)
+        return x
+
+    backend.num_calls = 0
+    assert run_future(hedge(0.01)(backend)(1)) == 1
+
+
+def test_budget(run_future):
+    """
+    Test that the budget limits the number of hedged calls.
+    """
+    backend = make_backend([0.02] * 100)
+    func = hedge(0.001, budget=RetryBudget(ratio=0., max_tokens=2))(backend)
+    run_future(asyncio.gather(*[func(i) for i in range(10)]))
+    assert backend.num_calls == 12
+
+
+def test_adaptive_delay(run_future):
+    """
+    Test that calls are hedged at a quantile of the observed latencies.
+    """
+    backend = make_backend([0.] * 20 + [0.03] * 5)
+    func = hedge(quantile=0.9, min_samples=20)(backend)
+    for i in range(20):
+        run_future(func(i))
+    assert backend.num_calls == 20
+    run_future(func(20))
+    assert backend.num_calls == 22
+
+
+def test_invalid_quantile():
+    """
+    Test that an invalid quantile raises an error.
+    """
+    with pytest.raises(ValueError):
+        hedge(quantile=95)
+
+
+def test_adaptive_delay_stable(run_future):
+    """
+    Test that the delay does not drift down when the hedged calls win.
+    """
+    backend = make_backend([0.02] * 2 + [0.5, 0.] * 10)
+    func = hedge(
+        quantile=0.5,
+        window=10,
+        min_samples=2,
+        budget=RetryBudget(ratio=1., max_tokens=10)
+    )(backend)
+
+    async def run():  # pylint: disable=missing-docstring
+        loop = asyncio.get_event_loop()
+        for i in range(12):
+            start = loop.time()
+            await func(i)
+            duration = loop.time() - start
+        return duration
+
+    assert run_future(run()) > 0.01
@@ -0,0 +1,59 @@
+"""
+Tests the lazy loading of the fsc.async_tools submodules.
+"""
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+import fsc.async_tools
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(fsc.async_tools.__file__))
+
+
+def test_lazy_import():
+    """
+    Test that importing the package does not load the submodules, and does
+    not read the version file.
+    """
+    code = '\n'.join([
+        'import sys, builtins',
+        'opened = []',
+        'orig_open = builtins.open',
+        'builtins.open = lambda f, *a, **k: opened.append(f) or orig_open(f, *a, **k)',
+        'import fsc.async_tools',
+        'assert not opened, opened',
+        'loaded = [m for m in sys.modules if m.startswith("fsc.")]',
+        'assert loaded == ["fsc.async_tools"], loaded',
+    ])
+    cmd = [sys.executable, '-c', code]
+    subprocess.run(
+        cmd, check=True, cwd=os.path.dirname(os.path.dirname(PACKAGE_DIR))
+    )
+
+
+@pytest.mark.parametrize('name', fsc.async_tools.__all__)
+def test_access(name):
+    """
+    Test that all public names can be accessed.
+    """
+    assert getattr(fsc.async_tools, name).__name__ == name
+    assert name in dir(fsc.async_tools)
+
+
+def test_version():
+    """
+    Test that the version is loaded on access.
+    """
+    with open(os.path.join(PACKAGE_DIR, 'version.txt')) as f:
+        assert fsc.async_tools.__version__ == f.read().strip()
+
+
+def test_invalid_name():
+    """
+    Test that accessing an undefined name raises an AttributeError.
+    """
+    with pytest.raises(AttributeError):
+        fsc.async_tools.does_not_exist  # pylint: disable=pointless-statement,no-member
@@ -80,3 +80,152 @@ def test_with_exception():
     assert res[:10] == list(range(10))
     for val in res[10:]:
         assert isinstance(val, ValueError)
+
+
+def test_priority():
+    """
+    Tests that waiting calls with a higher priority are admitted first.
+    """
+    order = []
+
+    @limit_parallel(1, priority=lambda x, prio: prio)
+    async def record(x, prio):  # pylint: disable=unused-argument
+        order.append(x)
+        await asyncio.sleep(0.)
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        asyncio.gather(
+            *[
+                asyncio.ensure_future(record(x, prio))
+                for x, prio in enumerate([0, 0, 1, 2, 1, 0])
+            ]
+        )
+    )
+    assert order == [0, 3, 2, 4, 1, 5]
+
+
+def test_priority_min_share():
+    """
+    Tests that low-priority calls are still admitted when min_share is set,
+    even if there are always high-priority calls waiting.
+    """
+    order = []
+
+    @limit_parallel(1, priority=lambda x: x, min_share=0.25)
+    async def record(x):
+        order.append(x)
+        await asyncio.sleep(0.)
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        asyncio.gather(
+            *[asyncio.ensure_future(record(0)) for _ in range(4)],
+            *[asyncio.ensure_future(record(1)) for _ in range(12)]
+        )
+    )
+    # The first call is admitted directly, after that every fourth
+    # admission goes to the longest-waiting call.
+    assert order[:10] == [0, 1, 1, 1, 1, 0, 1, 1, 1, 0]
+
+
+def test_priority_cancel():
+    """
+    Tests that cancelled waiters do not block the limit.
+    """
+
+    @limit_parallel(1, priority=lambda x: x)
+    async def identity(x):
+        await asyncio.sleep(0.)
+        return x
+
+    async def run():  # pylint: disable=missing-docstring
+        tasks = [asyncio.ensure_future(identity(x)) for x in range(5)]
+        await asyncio.sleep(0.)
+        tasks[2].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    res = asyncio.get_event_loop().run_until_complete(run())
+    assert isinstance(res[2], asyncio.CancelledError)
+    assert res[:2] + res[3:] == [0, 1, 3, 4]
+
+
+def test_invalid_min_share():
+    """
+    Tests that an invalid min_share raises an error.
+    """
+    with pytest.raises(ValueError):
+        limit_parallel(1, min_share=1.5)
+
+
+@pytest.fixture
+def weight_coro():
+    """
+    Returns a coroutine function that returns the total weight of the
+    instances that are currently running, including itself.
+    """
+    total = 0
+
+    async def inner(weight):  # pylint: disable=missing-docstring
+        nonlocal total
+        total += weight
+        res = total
+        await asyncio.sleep(0.)
+        total -= weight
+        return res
+
+    return inner
+
+
+def test_weight(weight_coro):  # pylint: disable=redefined-outer-name
+    """
+    Tests that the total weight of the parallel calls does not exceed the
+    maximum.
+    """
+    limited_coro = limit_parallel(10, weight=lambda w: w)(weight_coro)
+    loop = asyncio.get_event_loop()
+    res = loop.run_until_complete(
+        asyncio.gather(
+            *[
+                asyncio.ensure_future(limited_coro(w))
+                for w in [1, 3, 10, 2, 5, 7, 1, 1] * 10
+            ]
+        )
+    )
+    assert max(res) == 10
+
+
+def test_weight_no_overtaking():
+    """
+    Tests that light calls do not overtake a heavy call which is waiting.
+    """
+    order = []
+
+    @limit_parallel(4, weight=lambda x, w: w)
+    async def record(x, w):  # pylint: disable=unused-argument
+        order.append(x)
+        await asyncio.sleep(0.)
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        asyncio.gather(
+            *[
+                asyncio.ensure_future(record(x, w))
+                for x, w in enumerate([3, 4, 1, 1])
+            ]
+        )
+    )
+    assert order == [0, 1, 2, 3]
+
+
+def test_weight_too_large():
+    """
+    Tests that a call which can never be admitted raises an error.
+    """
+
+    @limit_parallel(2, weight=lambda w: w)
+    async def identity(w):
+        return w
+
+    with pytest.raises(ValueError):
+        asyncio.get_event_loop().run_until_complete(identity(3))
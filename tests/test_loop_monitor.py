@@ -0,0 +1,54 @@
+"""
+Tests for the LoopLagMonitor.
+"""
+
+import time
+import asyncio
+
+import pytest
+
+from fsc.async_tools import LoopLagMonitor
+
+
+def test_idle_loop(run_future):
+    """
+    Test that the lag of an idle event loop is small.
+    """
+
+    async def run():  # pylint: disable=missing-docstring
+        async with LoopLagMonitor(interval=0.005) as monitor:
+            await asyncio.sleep(0.1)
+        return monitor
+
+    monitor = run_future(run())
+    assert len(monitor) >= 5
+    assert monitor.percentiles()[50] < 0.005
+
+
+def test_blocked_loop(run_future):
+    """
+    Test that callbacks blocking the event loop are detected.
+    """
+    slow_lags = []
+
+    async def run():  # pylint: disable=missing-docstring
+        async with LoopLagMonitor(
+            interval=0.005, slow_threshold=0.02, on_slow=slow_lags.append
+        ) as monitor:
+            await asyncio.sleep(0.02)
+            time.sleep(0.05)
+            await asyncio.sleep(0.02)
+        return monitor
+
+    monitor = run_future(run())
+    assert monitor.num_slow == 1
+    assert slow_lags[0] >= 0.03
+    assert monitor.percentiles((100, ))[100] == slow_lags[0]
+
+
+def test_no_measurement():
+    """
+    Test that the percentiles cannot be computed without measurement.
+    """
+    with pytest.raises(ValueError):
+        LoopLagMonitor().percentiles()
@@ -0,0 +1,129 @@
+"""
+Tests for the ``memoize`` decorator.
+"""
+
+import asyncio
+
+import pytest
+
+from fsc.async_tools import memoize
+
+
+def make_backend():
+    """
+    Returns a coroutine function which returns its input together with the
+    number of calls made so far.
+    """
+
+    async def inner(x, delay=0.):  # pylint: disable=missing-docstring
+        inner.num_calls += 1
+        num_calls = inner.num_calls
+        await asyncio.sleep(delay)
+        return x, num_calls
+
+    inner.num_calls = 0
+    return inner
+
+
+def test_cache(run_future):
+    """
+    Test that results are cached per key.
+    """
+    backend = make_backend()
+    func = memoize()(backend)
+    assert run_future(func(1)) == (1, 1)
+    assert run_future(func(2)) == (2, 2)
+    assert run_future(func(1)) == (1, 1)
+    assert run_future(func(1, delay=0.)) == (1, 3)
+    func.cache_clear()
+    assert run_future(func(1)) == (1, 4)
+
+
+def test_kwargs_key(run_future):
+    """
+    Test that keyword arguments do not share keys with positional arguments.
+    """
+    func = memoize()(lambda *args, **kwargs: (args, kwargs))
+    assert run_future(func(x=1)) == ((), {'x': 1})
+    assert run_future(func((), (('x', 1), ))) == (((), (('x', 1), )), {})
+
+
+def test_single_flight(run_future):
+    """
+    Test that concurrent calls with the same key share a single call.
+    """
+    backend = make_backend()
+    func = memoize()(backend)
+    res = run_future(asyncio.gather(*[func(1, delay=0.01) for _ in range(10)]))
+    assert res == [(1, 1)] * 10
+    assert backend.num_calls == 1
+
+
+def test_single_flight_cancel(run_future):
+    """
+    Test that cancelling one caller does not cancel the shared call.
+    """
+    backend = make_backend()
+    func = memoize()(backend)
+
+    async def run():  # pylint: disable=missing-docstring
+        first = asyncio.ensure_future(func(1, delay=0.01))
+        second = asyncio.ensure_future(func(1, delay=0.01))
+        await asyncio.sleep(0.)
+        first.cancel()
+        return await second
+
+    assert run_future(run()) == (1, 1)
+
+
+def test_lru(run_future):
+    """
+    Test that the least recently used result is dropped.
+    """
+    backend = make_backend()
+    func = memoize(maxsize=2)(backend)
+    for x in [1, 2, 1, 3]:
+        run_future(func(x))
+    assert backend.num_calls == 3
+    assert run_future(func(1)) == (1, 1)
+    assert run_future(func(2)) == (2, 4)
+
+
+def test_exception_not_cached(run_future):
+    """
+    Test that exceptions are not cached.
+    """
+    num_calls = 0
+
+    async def fail_once():
+        nonlocal num_calls
+        num_calls += 1
+        if num_calls == 1:
+            raise ValueError
+        return num_calls
+
+    func = memoize()(fail_once)
+    with pytest.raises(ValueError):
+        run_future(func())
+    assert run_future(func()) == 2
+    assert run_future(func()) == 2
+
+
+def test_stale_while_revalidate(run_future):
+    """
+    Test that stale results are returned while they are refreshed, and
+    expired results are not returned.
+    """
+    backend = make_backend()
+    func = memoize(ttl=0.01, stale_ttl=0.05)(backend)
+
+    async def run():  # pylint: disable=missing-docstring
+        assert await func(1) == (1, 1)
+        await asyncio.sleep(0.02)
+        assert await func(1) == (1, 1)
+        await asyncio.sleep(0.005)
+        assert await func(1) == (1, 2)
+        await asyncio.sleep(0.1)
+        assert await func(1) == (1, 3)
+
+    run_future(run())
@@ -0,0 +1,133 @@
+"""
+Tests the PeriodicScheduler asynchronous context manager.
+"""
+import asyncio
+
+import pytest
+
+from fsc.async_tools import PeriodicScheduler
+
+
+def test_many_jobs(run_future):
+    """
+    Test that many periodic functions are all run from the same scheduler.
+    """
+    counts = [0] * 1000
+
+    def make_func(i):  # pylint: disable=missing-docstring
+        def inner():
+            counts[i] += 1
+
+        return inner
+
+    async def run():  # pylint: disable=missing-docstring
+        async with PeriodicScheduler() as scheduler:
+            for i in range(len(counts)):
+                scheduler.add(make_func(i), delay=0.01, jitter=0.005)
+            await asyncio.sleep(0.1)
+
+    run_future(run())
+    assert min(counts) >= 3
+    assert max(counts) <= 11
+
+
+def test_coroutine_job(run_future):
+    """
+    Test that the calls of a coroutine job do not overlap.
+    """
+    num_running = 0
+    max_running = 0
+    count = 0
+
+    async def coro():
+        nonlocal num_running, max_running, count
+        num_running += 1
+        max_running = max(max_running, num_running)
+        await asyncio.sleep(0.01)
+        num_running -= 1
+        count += 1
+
+    async def run():  # pylint: disable=missing-docstring
+        async with PeriodicScheduler() as scheduler:
+            scheduler.add(coro, delay=0.)
+            await asyncio.sleep(0.05)
+
+    run_future(run())
+    assert max_running == 1
+    assert count >= 3
+    assert num_running == 0
+
+
+def test_remove_reschedule(run_future):
+    """
+    Test removing and rescheduling functions.
+    """
+    calls = []
+
+    async def run():  # pylint: disable=missing-docstring
+        async with PeriodicScheduler() as scheduler:
+            job_a = scheduler.add(lambda: calls.append('a'), delay=0.01)
+            job_b = scheduler.add(lambda: calls.append('b'), delay=0.01)
+            await asyncio.sleep(0.001)
+            scheduler.remove(job_a)
+            scheduler.reschedule(job_b, delay=10.)
+            await asyncio.sleep(0.05)
+            with pytest.raises(ValueError):
+                scheduler.reschedule(job_a, delay=1.)
+
+    run_future(run())
+    assert sorted(calls) == ['a', 'b']
+
+
+def test_error(run_future):
+    """
+    Test that errors are raised when exiting, and only stop the failing job.
+    """
+    count = 0
+
+    def counter():
+        nonlocal count
+        count += 1
+
+    def error_func():
+        raise ValueError
+
+    async def run():  # pylint: disable=missing-docstring
+        async with PeriodicScheduler() as scheduler:
+            scheduler.add(error_func, delay=0.)
+            scheduler.add(counter, delay=0.005)
+            await asyncio.sleep(0.05)
+
+    with pytest.raises(ValueError):
+        run_future(run())
+    assert count >= 3
+
+
+@pytest.mark.parametrize('is_coroutine', [False, True])
+def test_remove_from_job(is_coroutine, run_future):
+    """
+    Test that a job which removes itself is not run again.
+    """
+    count = 0
+
+    def remove_self():
+        nonlocal count
+        count += 1
+        scheduler.remove(job)
+
+    async def remove_self_coro():
+        remove_self()
+
+    scheduler = PeriodicScheduler()
+    job = None
+
+    async def run():  # pylint: disable=missing-docstring
+        nonlocal job
+        async with scheduler:
+            job = scheduler.add(
+                remove_self_coro if is_coroutine else remove_self, delay=0.
+            )
+            await asyncio.sleep(0.05)
+
+    run_future(run())
+    assert count == 1
@@ -1,11 +1,12 @@
 """
 Tests the PeriodicTask asynchronous context manager.
 """
+import time
 import asyncio
 
 import pytest
 
-from fsc.async_tools import PeriodicTask
+from fsc.async_tools import PeriodicTask, VirtualTimeEventLoop
 
 
 class CallCounter:
@@ -101,3 +102,239 @@ def test_run_error(run_future):  # pylint: disable=redefined-outer-name
 
     with pytest.raises(ValueError):
         run_future(run())
+
+
+def run_virtual(periodic_task_kwargs, duration):
+    """
+    Runs a fixed-rate PeriodicTask on a VirtualTimeEventLoop for the given
+    (virtual) duration, and returns the times at which the function was
+    called. The function takes 0.07 on its first call, and no time
+    afterwards.
+    """
+    loop = VirtualTimeEventLoop()
+    times = []
+
+    async def func():
+        times.append(loop.time())
+        if len(times) == 1:
+            await asyncio.sleep(0.07)
+
+    async def run():
+        async with PeriodicTask(
+            func,
+            loop=loop,
+            fixed_rate=True,
+            run_on_exit=False,
+            **periodic_task_kwargs
+        ):
+            await asyncio.sleep(duration)
+
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+    return times
+
+
+def test_fixed_rate():
+    """
+    Test that the fixed-rate mode does not drift when the function takes time.
+    """
+    delay = 0.1
+    times = run_virtual(dict(delay=delay), duration=1.05)
+    expected_times = [i * delay for i in range(1, 11)]
+    assert times[1:] == pytest.approx(expected_times, abs=1e-3)
+
+
+def test_fixed_rate_align(run_future):  # pylint: disable=redefined-outer-name
+    """
+    Test that the fixed-rate deadlines can be aligned to the wall clock.
+    """
+    delay = 0.05
+    times = []
+
+    async def run():
+        async with PeriodicTask(
+            lambda: times.append(time.time()),
+            delay=delay,
+            fixed_rate=True,
+            align=True,
+            run_on_exit=False
+        ):
+            await asyncio.sleep(0.2)
+
+    run_future(run())
+    assert len(times) >= 3
+    for t in times:
+        phase = t % delay
+        assert min(phase, delay - phase) < 0.02
+
+
+@pytest.mark.parametrize(
+    'overrun, expected_times', [
+        ('skip', [0., 0.08, 0.1]),
+        ('coalesce', [0., 0.07, 0.08, 0.1]),
+        ('catch_up', [0., 0.07, 0.07, 0.07, 0.08, 0.1]),
+    ]
+)
+def test_fixed_rate_overrun(overrun, expected_times):
+    """
+    Test the different policies for handling missed deadlines.
+    """
+    times = run_virtual(dict(delay=0.02, overrun=overrun), duration=0.11)
+    assert times == pytest.approx(expected_times, abs=1e-3)
+
+
+class FakeClock:
+    """
+    Stand-in for the event loop, with a time which is set explicitly.
+    """
+
+    def __init__(self):
+        self.now = 0.
+
+    def time(self):
+        return self.now
+
+
+@pytest.mark.parametrize(
+    'overrun, now, expected', [
+        ('skip', 0.5, 1.),
+        ('coalesce', 0.5, 1.),
+        ('catch_up', 0.5, 1.),
+        ('skip', 1., 1.),
+        ('skip', 3.5, 4.),
+        ('coalesce', 3.5, 3.),
+        ('catch_up', 3.5, 1.),
+    ]
+)
+def test_next_deadline(overrun, now, expected):
+    """
+    Test the computation of the next deadline after the deadline 0, with a
+    delay of 1.
+    """
+    clock = FakeClock()
+    clock.now = now
+    periodic_task = PeriodicTask(
+        lambda: None, loop=clock, delay=1., fixed_rate=True, overrun=overrun
+    )
+    assert periodic_task._next_deadline(0.) == expected  # pylint: disable=protected-access
+
+
+@pytest.mark.parametrize(
+    'kwargs', [
+        dict(fixed_rate=True, delay=0.),
+        dict(fixed_rate=True, overrun='invalid'),
+    ]
+)
+def test_invalid_arguments(kwargs):
+    """
+    Test that invalid arguments raise an error.
+    """
+    with pytest.raises(ValueError):
+        PeriodicTask(lambda: None, **kwargs)
+
+
+def test_coroutine_task(run_future):  # pylint: disable=redefined-outer-name
+    """
+    Test that a coroutine function can be used as task function.
+    """
+    count = CallCounter()
+
+    async def coro():
+        await asyncio.sleep(0.)
+        count()
+
+    async def run():
+        async with PeriodicTask(coro, delay=0.001):
+            await asyncio.sleep(0.02)
+
+    run_future(run())
+    assert int(count) >= 3
+
+
+def test_run_in_executor(run_future):  # pylint: disable=redefined-outer-name
+    """
+    Test that a blocking function run in an executor does not block the
+    event loop.
+    """
+    count = CallCounter()
+
+    def blocking_func():
+        time.sleep(0.05)
+        count()
+
+    async def run():
+        start = time.monotonic()
+        async with PeriodicTask(
+            blocking_func, delay=0., run_in_executor=True, run_on_exit=False
+        ):
+            await asyncio.sleep(0.)
+            assert time.monotonic() - start < 0.05
+
+    run_future(run())
+    # The call which was running when exiting is waited for.
+    assert int(count) == 1
+
+
+@pytest.mark.parametrize('allow_overlap', [True, False])
+def test_overlap(run_future, allow_overlap):  # pylint: disable=redefined-outer-name
+    """
+    Test that calls overlap only when allowed.
+    """
+    num_running = 0
+    max_running = 0
+
+    async def coro():
+        nonlocal num_running, max_running
+        num_running += 1
+        max_running = max(max_running, num_running)
+        await asyncio.sleep(0.02)
+        num_running -= 1
+
+    async def run():
+        async with PeriodicTask(
+            coro, delay=0.005, allow_overlap=allow_overlap
+        ):
+            await asyncio.sleep(0.05)
+
+    run_future(run())
+    assert num_running == 0
+    if allow_overlap:
+        assert max_running > 1
+    else:
+        assert max_running == 1
+
+
+def test_invalid_executor():
+    """
+    Test that coroutine functions cannot be run in an executor.
+    """
+
+    async def coro():
+        pass
+
+    with pytest.raises(ValueError):
+        PeriodicTask(coro, run_in_executor=True)
+
+
+def test_reenter_after_error(run_future):  # pylint: disable=redefined-outer-name
+    """
+    Test that an error in one entry is not raised again in the next one.
+    """
+    should_fail = True
+
+    async def coro():
+        if should_fail:
+            raise ValueError('first')
+
+    periodic_task = PeriodicTask(coro, delay=0., run_on_exit=False)
+
+    async def run():  # pylint: disable=missing-docstring
+        async with periodic_task:
+            await asyncio.sleep(0.01)
+
+    with pytest.raises(ValueError):
+        run_future(run())
+    should_fail = False
+    run_future(run())
@@ -0,0 +1,193 @@
+"""
+Tests for the ``retry`` decorator and the retries in the BatchSubmitter.
+"""
+
+import asyncio
+
+import pytest
+
+from fsc.async_tools import retry, RetryPolicy, RetryBudget, BatchSubmitter
+
+
+def make_flaky(num_failures, exc_type=ValueError):
+    """
+    Returns a function which fails the given number of times before
+    returning its input.
+    """
+
+    def inner(x):  # pylint: disable=missing-docstring
+        inner.num_calls += 1
+        if inner.num_calls <= num_failures:
+            raise exc_type
+        return x
+
+    inner.num_calls = 0
+    return inner
+
+
+@pytest.mark.parametrize('num_failures', [0, 1, 2])
+def test_retry_success(num_failures, run_future):
+    """
+    Test that a call succeeds when it fails fewer than max_attempts times.
+    """
+    flaky = make_flaky(num_failures)
+    func = retry(max_attempts=3, base_delay=0.001)(flaky)
+    assert run_future(func(5)) == 5
+    assert flaky.num_calls == num_failures + 1
+
+
+def test_retry_give_up(run_future):
+    """
+    Test that the exception is raised after max_attempts attempts.
+    """
+    flaky = make_flaky(5)
+    func = retry(max_attempts=3, base_delay=0.001)(flaky)
+    with pytest.raises(ValueError):
+        run_future(func(5))
+    assert flaky.num_calls == 3
+
+
+@pytest.mark.parametrize(
+    'exc_type, num_calls', [(ValueError, 2), (KeyError, 4), (TypeError, 1)]
+)
+def test_retry_per_exception(exc_type, num_calls, run_future):
+    """
+    Test that the number of attempts depends on the exception type.
+    """
+    flaky = make_flaky(10, exc_type=exc_type)
+    func = retry(
+        base_delay=0.001, retry_on={
+            ValueError: 2,
+            LookupError: 4
+        }
+    )(flaky)
+    with pytest.raises(exc_type):
+        run_future(func(5))
+    assert flaky.num_calls == num_calls
+
+
+def test_retry_budget(run_future):
+    """
+    Test that the retry budget limits the number of retries.
+    """
+    budget = RetryBudget(ratio=0.1, max_tokens=2)
+    flaky = make_flaky(1000)
+    func = retry(max_attempts=3, base_delay=0., budget=budget)(flaky)
+    for _ in range(20):
+        with pytest.raises(ValueError):
+            run_future(func(5))
+    # The two initial tokens are used by the first call, the other calls
+    # add 1.9 tokens which allow one more retry.
+    assert flaky.num_calls == 20 + 2 + 1
+
+
+def test_retry_cancel(run_future):
+    """
+    Test that cancelling a call stops the retries.
+    """
+    flaky = make_flaky(1000)
+    func = retry(max_attempts=1000, base_delay=0.01)(flaky)
+
+    async def run():  # pylint: disable=missing-docstring
+        task = asyncio.ensure_future(func(5))
+        await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        num_calls = flaky.num_calls
+        await asyncio.sleep(0.05)
+        assert flaky.num_calls == num_calls
+
+    run_future(run())
+
+
+def test_invalid_arguments():
+    """
+    Test that a policy and keyword arguments cannot both be given.
+    """
+    with pytest.raises(ValueError):
+        retry(RetryPolicy(), max_attempts=2)
+
+
+def test_batch_submit_retry_items(run_future):
+    """
+    Test that only the failed inputs are submitted again.
+    """
+    batches = []
+    num_failures = {}
+
+    def func(inputs):  # pylint: disable=missing-docstring
+        batches.append(list(inputs))
+        results = []
+        for x in inputs:
+            num_failures[x] = num_failures.get(x, 0) + 1
+            if x % 2 and num_failures[x] <= 2:
+                results.append(ValueError(x))
+            else:
+                results.append(x)
+        return results
+
+    submitter = BatchSubmitter(
+        func,
+        timeout=0.,
+        retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001)
+    )
+    res = run_future(asyncio.gather(*[submitter(x) for x in range(10)]))
+    assert res == list(range(10))
+    assert batches[0] == list(range(10))
+    assert sorted(x for batch in batches[1:]
+                  for x in batch) == [1, 1, 3, 3, 5, 5, 7, 7, 9, 9]
+
+
+def test_batch_submit_retry_give_up(run_future):
+    """
+    Test that the exceptions are raised once the retries are exhausted.
+    """
+    num_calls = 0
+
+    def func(inputs):  # pylint: disable=missing-docstring
+        nonlocal num_calls
+        num_calls += 1
+        raise ValueError
+
+    submitter = BatchSubmitter(
+        func,
+        timeout=0.,
+        retry_policy=RetryPolicy(max_attempts=2, base_delay=0.)
+    )
+    res = run_future(
+        asyncio.gather(
+            *[submitter(x) for x in range(10)], return_exceptions=True
+        )
+    )
+    assert all(isinstance(r, ValueError) for r in res)
+    assert num_calls == 2
+
+
+def test_batch_submit_retry_cancel(run_future):
+    """
+    Test that an input is not submitted again if its caller is cancelled
+    while waiting for the retry.
+    """
+    batches = []
+
+    def func(inputs):  # pylint: disable=missing-docstring
+        batches.append(list(inputs))
+        return [ValueError(x) for x in inputs]
+
+    class FixedDelayPolicy(RetryPolicy):
+        def get_delay(self, num_attempts):
+            return 0.05
+
+    submitter = BatchSubmitter(
+        func, timeout=0., retry_policy=FixedDelayPolicy(max_attempts=3)
+    )
+
+    async def run():  # pylint: disable=missing-docstring
+        task = asyncio.ensure_future(submitter(1))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.sleep(0.1)
+
+    run_future(run())
+    assert batches == [[1]]
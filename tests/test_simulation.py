@@ -0,0 +1,101 @@
+"""
+Tests for the virtual time event loop and load simulation.
+"""
+
+import time
+import asyncio
+
+import pytest
+
+from fsc.async_tools import (
+    VirtualTimeEventLoop, simulate_load, BatchSubmitter, limit_parallel
+)
+
+
+def test_virtual_time():
+    """
+    Test that sleeping advances the virtual time without waiting.
+    """
+    loop = VirtualTimeEventLoop()
+
+    async def run():  # pylint: disable=missing-docstring
+        await asyncio.gather(asyncio.sleep(3600.), asyncio.sleep(1800.))
+        return loop.time()
+
+    start = time.monotonic()
+    try:
+        assert loop.run_until_complete(run()) == pytest.approx(3600.)
+    finally:
+        loop.close()
+    assert time.monotonic() - start < 1.
+
+
+def test_deadlock():
+    """
+    Test that waiting for something which never happens raises an error.
+    """
+    loop = VirtualTimeEventLoop()
+    try:
+        with pytest.raises(RuntimeError):
+            loop.run_until_complete(loop.create_future())
+    finally:
+        loop.close()
+
+
+def test_limit_parallel():
+    """
+    Test simulating a backend with limited parallelism.
+    """
+
+    def make_target(rng):  # pylint: disable=missing-docstring
+        @limit_parallel(2)
+        async def backend(idx):  # pylint: disable=unused-argument
+            await asyncio.sleep(rng.uniform(0.5, 1.5))
+
+        return backend
+
+    res = simulate_load(make_target, arrival_rate=1., duration=1000., seed=0)
+    assert res.num_failed == 0
+    assert res.num_calls == pytest.approx(1000, rel=0.1)
+    assert res.throughput == pytest.approx(1., rel=0.1)
+    assert res.percentile(50) >= 0.5
+    assert res.percentile(99) > res.percentile(50)
+
+
+def simulate_batch_submitter(max_batch_size):
+    """
+    Simulates a BatchSubmitter for a backend whose latency is dominated by
+    the batch overhead.
+    """
+
+    def make_target(rng):  # pylint: disable=missing-docstring,unused-argument
+        async def backend(inputs):  # pylint: disable=missing-docstring
+            await asyncio.sleep(0.1 + 0.001 * len(inputs))
+            return inputs
+
+        return BatchSubmitter(
+            backend,
+            timeout=0.05,
+            sleep_time=0.01,
+            max_batch_size=max_batch_size
+        )
+
+    return simulate_load(make_target, arrival_rate=100., duration=60., seed=1)
+
+
+def test_batch_submitter():
+    """
+    Test simulating a BatchSubmitter with different batch sizes. Since the
+    calls arrive faster than the timeout, the submitter waits for full
+    batches.
+    """
+    start = time.monotonic()
+    res_small = simulate_batch_submitter(10)
+    res_large = simulate_batch_submitter(100)
+    assert time.monotonic() - start < 10.
+    for res in [res_small, res_large]:
+        assert res.num_failed == 0
+        assert res.num_calls == len(res.latencies)
+        assert res.throughput == pytest.approx(100., rel=0.1)
+    assert 0.1 < res_small.percentile(50) < 0.2
+    assert res_large.percentile(50) > 0.5
@@ -60,3 +60,37 @@ def test_doc_func(func_to_wrap):
     if hasattr(func_to_wrap, '__name__'):
         assert wrapped.__name__ == func_to_wrap.__name__
     assert inspect.signature(func_to_wrap) == inspect.signature(wrapped)
+
+
+def test_coroutine_unchanged():
+    """
+    Test that coroutine functions are returned unchanged.
+    """
+    assert wrap_to_coroutine(coro_bare) is coro_bare
+
+
+def test_func_returning_awaitable():
+    """
+    Test that awaitables returned by a regular function are awaited.
+    """
+
+    async def coro(x):
+        await asyncio.sleep(0.)
+        return x
+
+    wrapped = wrap_to_coroutine(lambda x: coro(x))  # pylint: disable=unnecessary-lambda
+    loop = asyncio.get_event_loop()
+    assert loop.run_until_complete(wrapped(3)) == 3
+    assert loop.run_until_complete(wrapped([1, 2])) == [1, 2]
+
+
+PLAIN_VALUES = [None, True, 1, 1.5, 'a', b'a', (1, ), [1], dict(a=1), {1}]
+
+
+@pytest.mark.parametrize('value', PLAIN_VALUES)
+def test_plain_result(value):
+    """
+    Test that results of builtin types are returned unchanged.
+    """
+    wrapped = wrap_to_coroutine(lambda: value)
+    assert asyncio.get_event_loop().run_until_complete(wrapped()) is value
@@ -0,0 +1,143 @@
+"""
+Tests for the WriteBehindBuffer.
+"""
+
+import asyncio
+
+import pytest
+
+from fsc.async_tools import WriteBehindBuffer
+
+
+class Recorder:
+    """
+    Listable coroutine which records the batches it is called with.
+    """
+
+    def __init__(self, delay=0.):
+        self.batches = []
+        self.delay = delay
+
+    async def __call__(self, inputs):
+        await asyncio.sleep(self.delay)
+        self.batches.append(inputs)
+
+    @property
+    def inputs(self):
+        return [x for batch in self.batches for x in batch]
+
+
+def test_batch_size(run_future):
+    """
+    Test that full batches are submitted, and the rest on exit.
+    """
+    recorder = Recorder()
+
+    async def run():  # pylint: disable=missing-docstring
+        async with WriteBehindBuffer(
+            recorder, max_batch_size=10, flush_interval=10.
+        ) as buffer:
+            for i in range(25):
+                buffer.add(i)
+            await asyncio.sleep(0.01)
+            assert recorder.inputs == list(range(20))
+
+    run_future(run())
+    assert [len(batch) for batch in recorder.batches] == [10, 10, 5]
+    assert recorder.inputs == list(range(25))
+
+
+def test_flush_interval(run_future):
+    """
+    Test that waiting inputs are submitted periodically.
+    """
+    recorder = Recorder()
+
+    async def run():  # pylint: disable=missing-docstring
+        async with WriteBehindBuffer(
+            recorder, max_batch_size=10, flush_interval=0.01
+        ) as buffer:
+            await asyncio.sleep(0.005)
+            buffer.add(1)
+            await asyncio.sleep(0.02)
+            assert recorder.inputs == [1]
+
+    run_future(run())
+
+
+@pytest.mark.parametrize(
+    'overflow, expected', [('drop_oldest', [5, 6, 7, 8, 9]),
+                           ('drop_newest', [0, 1, 2, 3, 4])]
+)
+def test_overflow(overflow, expected, run_future):
+    """
+    Test the policies for dropping inputs when the buffer is full.
+    """
+    recorder = Recorder()
+    buffer = WriteBehindBuffer(
+        recorder, max_batch_size=5, max_size=5, overflow=overflow
+    )
+    for i in range(10):
+        buffer.add(i)
+    assert buffer.num_dropped == 5
+
+    async def run():  # pylint: disable=missing-docstring
+        async with buffer:
+            pass
+
+    run_future(run())
+    assert recorder.inputs == expected
+
+
+def test_overflow_raise():
+    """
+    Test that adding to a full buffer raises if requested.
+    """
+    buffer = WriteBehindBuffer(
+        lambda x: None, max_batch_size=5, max_size=5, overflow='raise'
+    )
+    for i in range(5):
+        buffer.add(i)
+    with pytest.raises(asyncio.QueueFull):
+        buffer.add(5)
+
+
+def test_max_num_parallel(run_future):
+    """
+    Test that inputs wait while the maximum number of batches are running.
+    """
+    recorder = Recorder(delay=0.01)
+
+    async def run():  # pylint: disable=missing-docstring
+        async with WriteBehindBuffer(
+            recorder, max_batch_size=2, max_num_parallel=2
+        ) as buffer:
+            for i in range(10):
+                buffer.add(i)
+            assert len(buffer) == 6
+
+    run_future(run())
+    assert sorted(recorder.inputs) == list(range(10))
+
+
+def test_on_error(run_future):
+    """
+    Test that failed batches are passed to the error callback.
+    """
+    errors = []
+
+    def func(inputs):  # pylint: disable=missing-docstring
+        if 3 in inputs:
+            raise ValueError
+
+    async def run():  # pylint: disable=missing-docstring
+        async with WriteBehindBuffer(
+            func,
+            max_batch_size=2,
+            on_error=lambda exc, batch: errors.append((type(exc), batch))
+        ) as buffer:
+            for i in range(6):
+                buffer.add(i)
+
+    run_future(run())
+    assert errors == [(ValueError, [2, 3])]